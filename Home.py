@@ -7,11 +7,23 @@ import inflection
 import folium
 import pandas as pd
 import streamlit as st
+import streamlit.components.v1 as components
 from PIL import Image
 import datetime
-from streamlit_folium import folium_static
+from streamlit_folium import st_folium
 from folium.plugins import MarkerCluster
 
+from fome_zero.aggregates import home_metrics
+from fome_zero.cuisines import cuisine_membership
+from fome_zero.data import get_dataset
+from fome_zero.filters import select
+from fome_zero.clusters import SERVER_CLUSTER_MIN_POINTS, cluster_pyramid, parse_bounds, viewport_clusters, viewport_layer
+from fome_zero.maps import map_html, map_points
+from fome_zero.export import EXPORT_FORMATS, available_formats, cached_export, export_bytes
+from fome_zero.sketches import approximate_metrics, cost_quantiles, country_sketches
+from fome_zero.timing import stage, start_page
+from fome_zero.admin import admin_requested, render_admin
+
 
 st.set_page_config(
     page_title="Home",
@@ -19,129 +31,28 @@ st.set_page_config(
     layout='wide', 
     initial_sidebar_state='auto'
 )
+start_page( 'Home' )
+
+# Painel de administração com os tempos por etapa, fora do menu: /?admin=<token> (ver fome_zero.admin)
+if admin_requested():
+    render_admin()
+    st.stop()
 
 # -------------------------------------
 # Funções
 # -------------------------------------
 
-def clean_code( df ): 
-    """ Esta funcao tem a responsabilidade de limpar o dataframe 
-    
-        Tipos de limpeza:
-        1. Preenchimento do nome dos países
-        2. Criação do Tipo de Categoria de Comida
-        3. Criação do nome das Cores
-        4. Renomear as colunas do DataFrame
-        5. Categorizar por tipo de culinária
-        6. Selecionar somente algumas colunas
-        7. Excluir linhas com dados ausentes
-        8. Excluir linhas duplicados
-        9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
-        
-        Input: Dataframe
-        Output: Dataframe
-    """
-    # 1. Preenchimento do nome dos países
- 
-    COUNTRIES = {
-    1: "India",
-    14: "Australia",
-    30: "Brazil",
-    37: "Canada",
-    94: "Indonesia",
-    148: "New Zeland",
-    162: "Philippines",
-    166: "Qatar",
-    184: "Singapure",
-    189: "South Africa",
-    191: "Sri Lanka",
-    208: "Turkey",
-    214: "United Arab Emirates",
-    215: "England",
-    216: "United States of America",
-    }
-
-    def country_name(country_id):
-        return COUNTRIES[country_id]
-    
-    df['country_name'] = df.loc[:, 'Country Code'].apply(lambda x: country_name (x))
-
-    # 2. Criação do Tipo de Categoria de Comida
-
-    def create_price_tye(price_range):
-        if price_range == 1:
-            return "cheap"
-        elif price_range == 2:
-            return "normal"
-        elif price_range == 3:
-            return "expensive"
-        else:
-            return "gourmet"
-    
-    df['price_range_name'] = df.loc[:, 'Price range'].apply(lambda x: create_price_tye (x))
-
-    # 3. Criação do nome das Cores
-    COLORS = {
-    "3F7E00": "darkgreen",
-    "5BA829": "green",
-    "9ACD32": "lightgreen",
-    "CDD614": "orange",
-    "FFBA00": "red",
-    "CBCBC8": "darkred",
-    "FF7800": "darkred",
-    }
-    def color_name(color_code):
-        return COLORS[color_code]
-
-    df['color_name'] = df.loc[:, 'Rating color'].apply(lambda x: color_name (x))
-
-    # 4. Renomear as colunas do DataFrame
-
-    def rename_columns(dataframe):
-        title = lambda x: inflection.titleize(x)
-        snakecase = lambda x: inflection.underscore(x)
-        spaces = lambda x: x.replace(" ", "")
-        cols_old = list(df.columns)
-        cols_old = list(map(title, cols_old))
-        cols_old = list(map(spaces, cols_old))
-        cols_new = list(map(snakecase, cols_old))
-        df.columns = cols_new
-        return df
-    df= rename_columns(df)
-
-    # 5. Categorizar por tipo de culinária
-    df["cuisines"]=df["cuisines"].fillna("")
-    df["cuisines"] = df.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
-
-     # 6. Selecionar somente algumas colunas
-    df_new = df.loc[:, ['restaurant_id', 'restaurant_name', 'city', 'address',
-       'locality', 'locality_verbose', 'longitude', 'latitude', 'cuisines',
-       'average_cost_for_two', 'currency', 'has_table_booking',
-       'has_online_delivery', 'is_delivering_now', 'aggregate_rating', 'rating_text',
-       'votes', 'country_name', 'price_range_name', 'color_name']]
-
-    # 7. Excluir linhas com dados ausentes
-    df_new = df_new.dropna(axis=0)
-
-    # 8. Excluir linhas duplicados
-    df_new = df_new.drop_duplicates()
-
-    # 9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
-    df_new = df_new.loc[df_new.average_cost_for_two!=0,:]
-
-    return df_new
-
+def margem_de_erro( coluna, nome ):
+    """ Legenda com a margem de erro da métrica no modo aproximado """
+    if aproximado:
+        coluna.caption( f"± {metricas['errors'][nome]:,.0f} (aprox.)" )
 
 # --------------------------- Inicio da Estrutura lógica do código --------------------------
 # ------------------------
-# Import dataset
+# Import dataset (tratado e em cache, compartilhado entre as páginas)
 # ------------------------
-df = pd.read_csv( 'zomato.csv' )
-
-# ------------------------
-# Limpando os dados
-# ------------------------
-df_new = clean_code( df )
+with stage( 'load' ):
+    dataset = get_dataset()
 
 
 # =======================================
@@ -174,25 +85,38 @@ default=['Brazil', 'England', 'Qatar', 'South Africa',
        'Canada', 'Australia'])
 
 st.sidebar.markdown( '## Dados tratados' )
-df.to_csv("your_name.csv")
 
 #-------------------------------------------
 
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
-
-csv = convert_df(df_new)
-
-st.sidebar.download_button(
-    label="Download",
-    data=csv,
-    file_name='data.csv',
-    mime='text/csv',
-)
-
-# Filtro de País
-linhas_selecionadas = df_new['country_name'].isin( paises )
-df_new = df_new.loc[linhas_selecionadas, :]
+# O arquivo só é gerado quando pedido, e fica em cache por versão do dataset, países e formato
+formato = st.sidebar.selectbox( 'Formato', available_formats() )
+arquivo = cached_export( dataset, paises, formato )
+if arquivo is None and st.sidebar.button( 'Preparar download' ):
+    with stage( 'export' ):
+        arquivo = export_bytes( dataset, paises, formato )
+
+if arquivo is not None:
+    file_name, mime = EXPORT_FORMATS[formato]
+    st.sidebar.download_button(
+        label="Download",
+        data=arquivo,
+        file_name=file_name,
+        mime=mime,
+    )
+
+# Modo aproximado: as métricas saem da soma dos sketches (HyperLogLog/DDSketch) de cada país
+aproximado = st.sidebar.checkbox( 'Métricas aproximadas (sketches)', value=False )
+
+if aproximado:
+    with stage( 'aggregate' ):
+        sketches = dataset.derived( 'country_sketches', country_sketches )
+        metricas = approximate_metrics( sketches, paises )
+else:
+    # Filtro de País (visão sobre as posições das linhas em cache por seleção, pelo índice de bitmaps)
+    with stage( 'filter' ):
+        linhas_selecionadas = select( dataset, paises )
+    with stage( 'aggregate' ):
+        metricas = home_metrics( linhas_selecionadas, dataset.derived( 'cuisine_membership', cuisine_membership ) )
 
 # =======================================
 # Layout no Streamlit
@@ -205,54 +129,63 @@ with st.container():
     col1, col2, col3, col4, col5 = st.columns( 5, gap='small' )
     with col1:
         # Restaurantes cadastrados
-        restaurantes_cadastrados = df_new.loc[:, 'restaurant_name'].nunique()
+        restaurantes_cadastrados = metricas['restaurants']
         col1.metric( 'Restaurantes Cadastrados', restaurantes_cadastrados )
+        margem_de_erro( col1, 'restaurants' )
 
 
     with col2:
         # Países Cadastrados
-        df_pais = df_new.loc[:, 'country_name'].nunique()
+        df_pais = metricas['countries']
         col2.metric( 'Países Cadastrados', df_pais )
+        margem_de_erro( col2, 'countries' )
 
     with col3:
         # Cidades Cadastradas
-        city = df_new.loc[:, 'city'].nunique()
+        city = metricas['cities']
         col3.metric( 'Cidades Cadastradas', city )
+        margem_de_erro( col3, 'cities' )
 
     with col4:
         # Avaliações Feitas na Plataforma
-        df_aux= df_new.loc[:,['restaurant_name','votes']].drop_duplicates()
-        df_aval = df_aux.votes.sum()
+        df_aval = metricas['votes']
         col4.metric( 'Avaliações Feitas na Plataforma', df_aval )
+        margem_de_erro( col4, 'votes' )
 
     with col5:
         # Tipos de Culinárias Oferecidas
-        cuisines = df_new.loc[:, 'cuisines'].nunique()
+        cuisines = metricas['cuisines']
         col5.metric( 'Tipos de Culinárias Oferecidas', cuisines )
+        margem_de_erro( col5, 'cuisines' )
+
+if aproximado and metricas['rating_median'] is not None:
+    with st.container():
+        col1, col2, col3 = st.columns( [1, 1, 3], gap='small' )
+        col1.metric( 'Nota Mediana', f"{metricas['rating_median']:.2f}" )
+        col1.caption( f"± {metricas['errors']['rating_median']:.2f} (aprox.)" )
+        col2.metric( 'Nota p90', f"{metricas['rating_p90']:.2f}" )
+        col2.caption( f"± {metricas['errors']['rating_p90']:.2f} (aprox.)" )
+        # Preço para dois na moeda de cada país (erro relativo de até 1%)
+        col3.dataframe( cost_quantiles( sketches, paises ).round( 2 ), hide_index=True, use_container_width=True )
 
 st.container()
 st.write ('### Mapa com a Localização dos restaurantes:')
 
-df_aux = (df_new.loc[:, ['city', 'aggregate_rating', 'currency', 'cuisines', 'color_name', 'restaurant_id','latitude', 'longitude', 'average_cost_for_two', 'restaurant_name']]
-             .groupby(['city', 'cuisines','color_name', 'currency', 'restaurant_id', 'restaurant_name'])
-             .median().reset_index())
-
-
-map1 = folium.Map()
-marker_cluster = folium.plugins.MarkerCluster().add_to(map1)
-
-                    
-for i in range ( len (df_aux) ):
-    popup_html = f'<div style="width: 250px;">' \
-                 f"<b>{df_aux.loc[i, 'restaurant_name']}</b><br><br>" \
-                 \
-                 f"Preço para dois: {df_aux.loc[i, 'average_cost_for_two']:.2f} ( {df_aux.loc[i, 'currency']})<br> " \
-                 f"Type: {df_aux.loc[i, 'cuisines']}<br>" \
-                 f"Nota: {df_aux.loc[i, 'aggregate_rating']}/5.0" \
-                 f'</div>'
-    folium.Marker ([df_aux.loc[i, 'latitude'], df_aux.loc[i, 'longitude']],
-                   popup=popup_html, width=500, height=500, tooltip='clique aqui', parse_html=True,  
-                   zoom_start=30, tiles= 'Stamen Toner', 
-                   icon=folium.Icon(color=df_aux.loc[i, 'color_name'] , icon='home')).add_to(marker_cluster)
-    
-folium_static(map1)
+with stage( 'aggregate' ):
+    points = dataset.derived( 'map_points', map_points )
+if points['country_name'].isin( paises ).sum() < SERVER_CLUSTER_MIN_POINTS:
+    # Mapa renderizado uma vez por seleção de países (marcadores montados no navegador)
+    with stage( 'render' ):
+        components.html( map_html( dataset, paises ), height=510, width=700 )
+else:
+    # Muitos restaurantes: só os clusters da janela visível, calculados no servidor
+    with stage( 'aggregate' ):
+        pyramid = dataset.derived( 'cluster_pyramid', lambda df: cluster_pyramid( points ) )
+    with stage( 'render' ):
+        viewport = st.session_state.get( 'mapa' ) or {}
+        bounds = parse_bounds( viewport.get( 'bounds' ) )
+        zoom = viewport.get( 'zoom' ) or 1
+        view = viewport_clusters( pyramid, paises, bounds, zoom )
+        st_folium( folium.Map( zoom_start=1 ), key='mapa', height=500, width=700, returned_objects=['bounds', 'zoom'],
+                   feature_group_to_add=viewport_layer( pyramid, view ), zoom=zoom,
+                   center=( ( bounds[0] + bounds[2] ) / 2, ( bounds[1] + bounds[3] ) / 2 ) if viewport else None )
@@ -0,0 +1,71 @@
+# Libraries
+import hmac
+import os
+
+import streamlit as st
+
+from fome_zero.timing import CAPTURE_MODES, capture_mode, export_json, reset, set_capture, stage_captures, stage_summary
+
+
+# Parâmetro da URL que abre o painel (fora do menu de páginas): /?admin=<token>
+ADMIN_PARAM = 'admin'
+
+# Token do painel: variável de ambiente ou chave admin_token do .streamlit/secrets.toml; sem
+# token configurado o painel fica desligado (ele liga o cProfile/tracemalloc do processo todo)
+ADMIN_TOKEN_ENV = 'FOME_ZERO_ADMIN_TOKEN'
+ADMIN_TOKEN_SECRET = 'admin_token'
+
+
+# =======================================
+# Funções
+# =======================================
+
+def admin_token():
+    """ Token configurado para o painel de administração, ou None """
+    token = os.environ.get( ADMIN_TOKEN_ENV )
+    if not token:
+        try:
+            token = st.secrets.get( ADMIN_TOKEN_SECRET )
+        except FileNotFoundError:  # sem secrets.toml
+            token = None
+    return str( token ) if token else None
+
+# -----------------------------------------------------------------------------------------------
+def admin_requested():
+    """ True se a URL pediu o painel de administração com o token configurado """
+    token = admin_token()
+    values = st.experimental_get_query_params().get( ADMIN_PARAM, [] )
+    if token is None or not values:
+        return False
+    return hmac.compare_digest( values[-1].encode(), token.encode() )
+
+# -----------------------------------------------------------------------------------------------
+def render_admin():
+    """ Painel com os tempos de cada etapa das páginas (p50/p95/p99 entre todas as sessões do
+        processo), o modo de captura detalhada e o download em JSON """
+    st.title( '⏱️ Tempos por etapa' )
+
+    options = ['desligada'] + CAPTURE_MODES
+    current = capture_mode() or 'desligada'
+    mode = st.sidebar.radio( 'Captura detalhada', options, index=options.index( current ) )
+    if mode != current:
+        set_capture( None if mode == 'desligada' else mode )
+
+    st.sidebar.download_button( 'Exportar JSON', data=export_json(), file_name='timings.json', mime='application/json' )
+    if st.sidebar.button( 'Zerar amostras' ):
+        reset()
+
+    summary = stage_summary()
+    if summary.empty:
+        st.info( 'Nenhuma etapa registrada ainda: navegue pelas páginas e volte aqui.' )
+        return
+    st.dataframe( summary.round( 2 ), hide_index=True, use_container_width=True )
+
+    for ( page, name ), capture in sorted( stage_captures().items() ):
+        with st.expander( f'{page} · {name}' ):
+            if 'profile' in capture:
+                st.code( capture['profile'] )
+            else:
+                st.write( f"Pico de memória alocada na etapa: {capture['peak_kb']} KB" )
+                if capture.get( 'approximate' ):
+                    st.caption( 'Aproximado: outra sessão alocou memória durante a etapa (o tracemalloc mede o processo inteiro).' )
@@ -0,0 +1,375 @@
+# Libraries
+import heapq
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from fome_zero.cuisines import cuisine_membership, distinct_cuisines, explode
+
+
+# =======================================
+# Visão Home
+# =======================================
+
+def distinct_count( view, column ):
+    """ Valores distintos da coluna nas linhas da visão (categorias contadas pelos códigos) """
+    series = view.df[column]
+    if isinstance( series.dtype, pd.CategoricalDtype ):
+        codes = view.codes( column )
+        return int( np.count_nonzero( np.bincount( codes[codes >= 0], minlength=len( series.cat.categories ) ) ) )
+    return int( pd.unique( view.column( column ) ).size )
+
+# -----------------------------------------------------------------------------------------------
+def home_metrics( view, membership ):
+    """ Métricas do Home sobre as linhas da visão, lendo só as colunas usadas (sem copiar o frame)
+
+        Input: RowView do dataframe tratado (filters.select), CuisineMembership
+        Output: dicionário com restaurants, countries, cities, votes e cuisines
+    """
+    votes = view.frame( ['restaurant_name', 'votes'] ).drop_duplicates()
+    return {
+        'restaurants': distinct_count( view, 'restaurant_name' ),
+        'countries': distinct_count( view, 'country_name' ),
+        'cities': distinct_count( view, 'city' ),
+        'votes': int( votes['votes'].sum() ),
+        'cuisines': distinct_cuisines( membership, view.rows ),
+    }
+
+
+# =======================================
+# Visão Países
+# =======================================
+
+def country_cube( state ):
+    """ Tabela agregada por país, derivada do estado agregado do dataset
+
+        Colunas:
+        - restaurants: restaurantes (nomes) distintos
+        - cities: cidades distintas
+        - votes_sum / votes_count: soma e quantidade de avaliações (linhas)
+        - cost_sum / cost_count: soma e quantidade do preço do prato para dois (linhas)
+
+        Input: AggregateState
+        Output: Dataframe indexado por country_name
+    """
+    cube = pd.DataFrame( {
+        'restaurants': state.country_names.groupby( level='country_name' ).size(),
+        'cities': state.country_cities.groupby( level='country_name' ).size(),
+    } )
+    cube = cube.join( state.country_sums, how='outer' ).fillna( 0 ).astype( 'int64' )
+    return cube.loc[:, ['restaurants', 'cities', 'votes_sum', 'votes_count', 'cost_sum', 'cost_count']]
+
+# -----------------------------------------------------------------------------------------------
+def select_countries( cube, paises ):
+    """ Recorta a tabela agregada nos países selecionados (sem tocar no dataframe de linhas)
+
+        Input: tabela agregada por país, lista de países
+        Output: Dataframe com as linhas dos países selecionados
+    """
+    return cube.loc[cube.index.isin( paises ), :]
+
+
+# =======================================
+# Visão Cidades
+# =======================================
+
+# Notas de 0.0 a 5.0 em passos de 0.1 (a nota agregada tem uma casa decimal)
+RATING_BUCKETS = 51
+
+# Índice agregado por (país, cidade); os histogramas são acumulados por faixa de nota
+CityIndex = namedtuple( 'CityIndex', ['keys', 'restaurants', 'cuisines', 'max_rating_cum', 'min_rating_cum'] )
+
+# -----------------------------------------------------------------------------------------------
+def rating_bucket( ratings ):
+    """ Faixa (0..50) de cada nota: nota * 10 arredondada """
+    return np.clip( np.rint( np.asarray( ratings, dtype='float64' ) * 10 ), 0, RATING_BUCKETS - 1 ).astype( np.intp )
+
+# -----------------------------------------------------------------------------------------------
+def city_index( state ):
+    """ Índice agregado por (país, cidade), derivado do estado agregado do dataset
+
+        Para cada cidade guarda a quantidade de restaurantes (nomes) distintos, de tipos de
+        culinária distintos (todas as culinárias de cada restaurante) e dois histogramas
+        acumulados por faixa de nota: da maior e da menor nota de cada restaurante. Um
+        restaurante tem nota acima de X se sua maior nota passa de X, e abaixo de X se sua
+        menor nota fica abaixo de X; assim qualquer limite de nota é respondido pelos
+        histogramas, sem reler as linhas.
+
+        Input: AggregateState
+        Output: CityIndex
+    """
+    ratings = ( state.city_ratings.index.to_frame( index=False )
+                  .groupby( ['country_name', 'city', 'restaurant_name'] )['bucket'].agg( ['max', 'min'] ) )
+    city_keys = ratings.index.droplevel( 'restaurant_name' )
+    keys = city_keys.unique()
+    codes = keys.get_indexer( city_keys )
+    n = len( keys )
+
+    def cumulative_histogram( buckets ):
+        hist = np.bincount( codes * RATING_BUCKETS + buckets, minlength=n * RATING_BUCKETS )
+        return hist.reshape( n, RATING_BUCKETS ).cumsum( axis=1 )
+
+    cuisine_codes = keys.get_indexer( state.city_cuisines.index.droplevel( 'cuisine' ) )
+
+    return CityIndex(
+        keys=keys.to_frame( index=False ),
+        restaurants=np.bincount( codes, minlength=n ),
+        cuisines=np.bincount( cuisine_codes, minlength=n ),
+        max_rating_cum=cumulative_histogram( ratings['max'].to_numpy( dtype=np.intp ) ),
+        min_rating_cum=cumulative_histogram( ratings['min'].to_numpy( dtype=np.intp ) ),
+    )
+
+# -----------------------------------------------------------------------------------------------
+def city_counts( index, metric, threshold=None ):
+    """ Contagem por cidade de uma métrica do índice
+
+        Input: CityIndex, métrica ('restaurants', 'cuisines', 'rating_above', 'rating_below'),
+               limite de nota para as métricas de nota
+        Output: array com a contagem de cada cidade do índice
+    """
+    if metric == 'restaurants':
+        return index.restaurants
+    if metric == 'cuisines':
+        return index.cuisines
+
+    scaled = threshold * 10
+    if metric == 'rating_above':
+        # faixas b com b > 10 * limite
+        k = int( np.floor( scaled + 1e-9 ) )
+        if k < 0:
+            return index.max_rating_cum[:, -1]
+        return index.max_rating_cum[:, -1] - index.max_rating_cum[:, min( k, RATING_BUCKETS - 1 )]
+    if metric == 'rating_below':
+        # faixas b com b < 10 * limite
+        k = int( np.ceil( scaled - 1e-9 ) ) - 1
+        if k < 0:
+            return np.zeros( len( index.restaurants ), dtype='int64' )
+        return index.min_rating_cum[:, min( k, RATING_BUCKETS - 1 )]
+    raise ValueError( f'Métrica desconhecida: {metric}' )
+
+# -----------------------------------------------------------------------------------------------
+def top_cities( index, paises, metric, n, threshold=None ):
+    """ Top N cidades dos países selecionados por uma métrica do índice (seleção parcial, nlargest)
+
+        Input: CityIndex, lista de países, métrica, N, limite de nota (métricas de nota)
+        Output: Dataframe com city, country_name e a coluna da métrica
+    """
+    counts = pd.Series( city_counts( index, metric, threshold ) )
+    counts = counts[index.keys['country_name'].isin( paises ).to_numpy() & ( counts > 0 ).to_numpy()]
+    top = counts.nlargest( n )
+
+    df_aux = index.keys.loc[top.index, ['city', 'country_name']]
+    df_aux[metric] = top.to_numpy()
+    return df_aux.reset_index( drop=True )
+
+
+# =======================================
+# Visão Cozinhas
+# =======================================
+
+# counts: culinárias distintas por país (Series indexada pelo nome do país);
+# options: todas as culinárias, em ordem alfabética (opções da barra lateral)
+CuisineCatalog = namedtuple( 'CuisineCatalog', ['counts', 'options'] )
+
+# -----------------------------------------------------------------------------------------------
+def cuisine_catalog( state ):
+    """ Culinárias distintas por país e lista de culinárias, derivadas do estado agregado
+
+        Um restaurante conta em todas as culinárias que oferece (cuisines.cuisine_membership).
+
+        Input: AggregateState
+        Output: CuisineCatalog
+    """
+    pairs = state.city_cuisines.index.droplevel( 'city' ).unique()
+    counts = pd.Series( pairs.get_level_values( 'country_name' ) ).value_counts().sort_index()
+    counts.index.name = 'country_name'
+    return CuisineCatalog( counts, list( state.cuisine_ratings.index ) )
+
+# -----------------------------------------------------------------------------------------------
+def cuisine_ratings( state ):
+    """ Nota média por culinária, contando o restaurante em cada culinária que ele oferece
+
+        Input: AggregateState
+        Output: Dataframe com cuisines e aggregate_rating (float64)
+    """
+    ratings = state.cuisine_ratings
+    return pd.DataFrame( { 'cuisines': ratings.index.to_numpy(),
+                           'aggregate_rating': ratings['rating_tenths'].to_numpy() / 10 / ratings['rating_count'].to_numpy() } )
+
+# -----------------------------------------------------------------------------------------------
+def diverse_countries( catalog, paises, qtde_rest ):
+    """ Países da seleção com pelo menos qtde_rest culinárias distintas (None = todos os países)
+
+        Input: CuisineCatalog, lista de países, mínimo de culinárias
+        Output: lista de países
+    """
+    counts = catalog.counts
+    if paises is not None:
+        counts = counts[counts.index.isin( paises )]
+    return list( counts.index[counts.to_numpy() >= qtde_rest] )
+
+# Maior quantidade de restaurantes que a página pode pedir (slider da barra lateral)
+TOP_K = 20
+
+TOP_COLUMNS = ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'cuisines',
+               'average_cost_for_two', 'currency', 'aggregate_rating', 'votes']
+
+# rows: top K restaurantes de cada (país, culinária), em ordem decrescente de
+# (nota, id, nome); partitions: {país: {culinária: (início, fim)}} em rows;
+# sort_keys: chave de ordenação de cada linha de rows
+TopIndex = namedtuple( 'TopIndex', ['rows', 'partitions', 'sort_keys'] )
+
+# -----------------------------------------------------------------------------------------------
+def cuisine_top_index( df, k=TOP_K ):
+    """ Índice pré-ordenado com os top K restaurantes de cada (país, culinária)
+
+        Um restaurante entra na partição de cada culinária que oferece; a coluna cuisines das
+        linhas do índice é a culinária da partição.
+
+        Input: Dataframe tratado, K
+        Output: TopIndex
+    """
+    columns = [col for col in TOP_COLUMNS if col != 'cuisines']
+    rows = explode( df, cuisine_membership( df ), columns ).rename( columns={'cuisine': 'cuisines'} )
+    rows = rows.loc[:, TOP_COLUMNS].drop_duplicates()
+    rows = rows.sort_values( ['country_name', 'cuisines', 'aggregate_rating', 'restaurant_id', 'restaurant_name'],
+                             ascending=[True, True, False, False, False] )
+    rows = rows.loc[rows.groupby( ['country_name', 'cuisines'], observed=True ).cumcount().to_numpy() < k, :]
+    rows = rows.reset_index( drop=True )
+
+    partitions = {}
+    keys = pd.MultiIndex.from_arrays( [rows['country_name'].astype( str ), rows['cuisines'].astype( str )] )
+    starts = np.flatnonzero( np.r_[True, keys[1:] != keys[:-1]] )
+    stops = np.r_[starts[1:], len( rows )]
+    for start, stop in zip( starts, stops ):
+        country, cuisine = keys[start]
+        partitions.setdefault( country, {} )[cuisine] = ( int( start ), int( stop ) )
+
+    # o último elemento (-posição) mantém cada partição em ordem decrescente mesmo em empates
+    sort_keys = list( zip( rows['aggregate_rating'].astype( 'float64' ), rows['restaurant_id'].astype( 'int64' ),
+                           rows['restaurant_name'], -np.arange( len( rows ) ) ) )
+    return TopIndex( rows, partitions, sort_keys )
+
+# -----------------------------------------------------------------------------------------------
+def top_restaurants_merge( index, paises, cuisines, k ):
+    """ Top k restaurantes dos países e culinárias selecionados
+
+        Faz um k-way merge das partições (já ordenadas) selecionadas e para nas k primeiras
+        linhas, então o custo é proporcional a k e ao número de partições, não ao dataset.
+        Um restaurante presente em várias culinárias selecionadas aparece uma vez só.
+
+        Input: TopIndex, lista de países, lista de culinárias, k
+        Output: Dataframe com as colunas de TOP_COLUMNS, em ordem decrescente de nota
+    """
+    selected = []
+    for country in paises:
+        country_partitions = index.partitions.get( country, {} )
+        for cuisine in cuisines:
+            if cuisine in country_partitions:
+                start, stop = country_partitions[cuisine]
+                selected.append( index.sort_keys[start:stop] )
+
+    positions, seen = [], set()
+    for key in heapq.merge( *selected, reverse=True ):
+        if len( positions ) >= k:
+            break
+        if key[1] not in seen:
+            seen.add( key[1] )
+            positions.append( -key[-1] )
+    return index.rows.iloc[positions].reset_index( drop=True )
+
+
+# =======================================
+# Estado agregado (atualizável por lote)
+# =======================================
+
+# Tabelas de contagem de linhas por chave, de onde saem country_cube, city_index,
+# cuisine_catalog e cuisine_ratings. O estado de um conjunto de linhas somado ao de outro é o
+# estado da união, e subtrair o estado de linhas removidas dá o estado sem elas; assim um lote
+# novo atualiza os agregados sem reler o dataset inteiro.
+# - country_sums: soma/quantidade de votos e de preço por país
+# - country_names / country_cities: linhas por (país, restaurante) e por (país, cidade)
+# - city_ratings: linhas por (país, cidade, restaurante, faixa de nota)
+# - city_cuisines: linhas por (país, cidade, culinária)
+# - cuisine_ratings: soma das notas (em décimos, inteira) e quantidade por culinária
+AggregateState = namedtuple( 'AggregateState', ['country_sums', 'country_names', 'country_cities',
+                                                'city_ratings', 'city_cuisines', 'cuisine_ratings'] )
+
+# Agregados das páginas derivados do estado: nome no cache do Dataset -> função
+STATE_AGGREGATES = {
+    'country_cube': country_cube,
+    'city_index': city_index,
+    'cuisine_catalog': cuisine_catalog,
+    'cuisine_ratings': cuisine_ratings,
+}
+
+# -----------------------------------------------------------------------------------------------
+def aggregate_state( df ):
+    """ Estado agregado das linhas do dataframe tratado
+
+        Input: Dataframe tratado
+        Output: AggregateState
+    """
+    keys = pd.DataFrame( {
+        'country_name': df['country_name'].astype( str ).to_numpy( dtype=object ),
+        'city': df['city'].astype( str ).to_numpy( dtype=object ),
+        'restaurant_name': df['restaurant_name'].astype( str ).to_numpy( dtype=object ),
+        'bucket': rating_bucket( df['aggregate_rating'] ),
+        'votes': df['votes'].to_numpy( dtype='int64' ),
+        'cost': df['average_cost_for_two'].to_numpy( dtype='int64' ),
+    } )
+
+    country_sums = keys.groupby( 'country_name' ).agg( votes_sum=( 'votes', 'sum' ), votes_count=( 'votes', 'count' ),
+                                                      cost_sum=( 'cost', 'sum' ), cost_count=( 'cost', 'count' ) )
+
+    membership = cuisine_membership( df )
+    cuisines = keys.loc[:, ['country_name', 'city', 'bucket']].iloc[membership.rows].reset_index( drop=True )
+    cuisines['cuisine'] = membership.names[membership.indices]
+    cuisine_ratings = cuisines.groupby( 'cuisine' ).agg( rating_tenths=( 'bucket', 'sum' ), rating_count=( 'bucket', 'count' ) )
+
+    return AggregateState(
+        country_sums=country_sums.astype( 'int64' ),
+        country_names=keys.groupby( ['country_name', 'restaurant_name'] ).size(),
+        country_cities=keys.groupby( ['country_name', 'city'] ).size(),
+        city_ratings=keys.groupby( ['country_name', 'city', 'restaurant_name', 'bucket'] ).size(),
+        city_cuisines=cuisines.groupby( ['country_name', 'city', 'cuisine'] ).size(),
+        cuisine_ratings=cuisine_ratings.astype( 'int64' ),
+    )
+
+# -----------------------------------------------------------------------------------------------
+def merge_states( state, delta, sign=1 ):
+    """ Soma (sign=1) ou subtrai (sign=-1) o estado de um conjunto de linhas
+
+        Chaves que ficam sem linhas saem das tabelas, então os distintos (restaurantes,
+        cidades, culinárias) continuam corretos depois de remoções.
+
+        Input: AggregateState, AggregateState do lote, sinal
+        Output: AggregateState
+    """
+    def merge( table, other, rows ):
+        merged = table.add( other * sign, fill_value=0 ).astype( 'int64' )
+        return merged.loc[rows( merged ) > 0].sort_index()
+
+    country_rows = lambda table: table['votes_count']
+    cuisine_rows = lambda table: table['rating_count']
+    series_rows = lambda table: table
+    return AggregateState(
+        country_sums=merge( state.country_sums, delta.country_sums, country_rows ),
+        country_names=merge( state.country_names, delta.country_names, series_rows ),
+        country_cities=merge( state.country_cities, delta.country_cities, series_rows ),
+        city_ratings=merge( state.city_ratings, delta.city_ratings, series_rows ),
+        city_cuisines=merge( state.city_cuisines, delta.city_cuisines, series_rows ),
+        cuisine_ratings=merge( state.cuisine_ratings, delta.cuisine_ratings, cuisine_rows ),
+    )
+
+# -----------------------------------------------------------------------------------------------
+def dataset_aggregate( dataset, name ):
+    """ Agregado de página (ver STATE_AGGREGATES) do dataset, em cache por versão
+
+        Input: Dataset, nome do agregado
+        Output: resultado da função do agregado sobre o estado do dataset
+    """
+    state = dataset.derived( 'aggregate_state', aggregate_state )
+    return dataset.derived( name, lambda df: STATE_AGGREGATES[name]( state ) )
+
@@ -0,0 +1,245 @@
+# Libraries
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import traceback
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from fome_zero import queries
+from fome_zero.data import DATA_PATH, get_dataset
+
+
+# Porta padrão (o Streamlit usa a 8501)
+API_PORT = 8502
+
+# Teto de memória das respostas serializadas mantidas em cache (compartilhado entre conexões)
+MAX_CACHED_RESPONSE_BYTES = 16 * 1024 * 1024
+
+# Maior cabeçalho de requisição aceito
+MAX_HEADER_BYTES = 16 * 1024
+
+_response_cache = OrderedDict()
+_response_lock = threading.Lock()
+
+
+# =======================================
+# Parâmetros e rotas
+# =======================================
+
+def text_list( values ):
+    """ Lista de valores: ?paises=Brazil&paises=India ou ?paises=Brazil,India """
+    return [item.strip() for value in values for item in value.split( ',' ) if item.strip()]
+
+# -----------------------------------------------------------------------------------------------
+def last( convert ):
+    """ Conversor que usa só o último valor do parâmetro (?n=5&n=10 -> 10) """
+    return lambda values: convert( values[-1] )
+
+# -----------------------------------------------------------------------------------------------
+def finite_float( value ):
+    """ Número finito (inf e nan passam no float, mas não servem de limite) """
+    number = float( value )
+    if not math.isfinite( number ):
+        raise ValueError( f'Valor deve ser um número finito, não {value}' )
+    return number
+
+# -----------------------------------------------------------------------------------------------
+def order( value ):
+    """ best/worst -> ascending da ordenação """
+    if value not in ( 'best', 'worst' ):
+        raise ValueError( f'order deve ser best ou worst, não {value}' )
+    return value == 'worst'
+
+# Rota -> ( consulta, {parâmetro da URL: ( argumento da consulta, conversor )} )
+ROUTES = {
+    '/countries': ( queries.countries, { 'paises': ( 'paises', text_list ),
+                                         'metric': ( 'metric', last( str ) ) } ),
+    '/cities': ( queries.cities, { 'paises': ( 'paises', text_list ),
+                                   'metric': ( 'metric', last( str ) ),
+                                   'n': ( 'n', last( int ) ),
+                                   'threshold': ( 'threshold', last( finite_float ) ) } ),
+    '/cuisines': ( queries.cuisines, { 'n': ( 'n', last( int ) ),
+                                       'order': ( 'ascending', last( order ) ) } ),
+    '/restaurants': ( queries.restaurants, { 'paises': ( 'paises', text_list ),
+                                             'cuisines': ( 'cuisine_names', text_list ),
+                                             'n': ( 'n', last( int ) ),
+                                             'min_cuisines': ( 'min_cuisines', last( int ) ) } ),
+    '/home': ( queries.home, { 'paises': ( 'paises', text_list ) } ),
+}
+
+
+# =======================================
+# Requisições (sem rede: testável chamando handle_request)
+# =======================================
+
+def parse_params( route, query ):
+    """ Converte a query string nos argumentos da consulta da rota
+
+        Input: rota de ROUTES, query string
+        Output: dicionário de argumentos (ValueError se algum parâmetro for inválido)
+    """
+    converters = ROUTES[route][1]
+    kwargs = {}
+    for name, values in parse_qs( query, keep_blank_values=True ).items():
+        if name not in converters:
+            raise ValueError( f'Parâmetro desconhecido em {route}: {name}' )
+        argument, convert = converters[name]
+        kwargs[argument] = convert( values )
+    return kwargs
+
+# -----------------------------------------------------------------------------------------------
+def normalize_params( kwargs ):
+    """ Argumentos normalizados (listas ordenadas, sem repetição): a mesma consulta em outra ordem
+        roda com os mesmos argumentos, cai na mesma chave de cache e tem o mesmo ETag """
+    return { name: sorted( set( value ) ) if isinstance( value, list ) else value for name, value in kwargs.items() }
+
+# -----------------------------------------------------------------------------------------------
+def params_key( kwargs ):
+    """ Chave de cache dos argumentos já normalizados (normalize_params) """
+    return tuple( sorted( ( name, tuple( value ) if isinstance( value, list ) else value )
+                          for name, value in kwargs.items() ) )
+
+# -----------------------------------------------------------------------------------------------
+def to_json( result ):
+    """ Resultado da consulta (Dataframe ou dicionário) em JSON; as notas são float32, então 6 casas
+        bastam (sem o 4.9000000954 da conversão para double) """
+    if isinstance( result, pd.DataFrame ):
+        return result.to_json( orient='records', force_ascii=False, double_precision=6 )
+    return json.dumps( result, ensure_ascii=False )
+
+# -----------------------------------------------------------------------------------------------
+def response_etag( version, route, key ):
+    """ ETag da resposta: versão do dataset + hash da consulta; muda quando o dataset muda """
+    digest = hashlib.sha1( repr( ( route, key ) ).encode() ).hexdigest()[:16]
+    return f'"{version[:16]}-{digest}"'
+
+# -----------------------------------------------------------------------------------------------
+def cached_response( dataset, route, kwargs ):
+    """ Corpo JSON e ETag da consulta, em cache por versão do dataset, rota e parâmetros
+
+        Input: Dataset, rota de ROUTES, argumentos da consulta
+        Output: ( corpo em bytes, ETag )
+    """
+    kwargs = normalize_params( kwargs )
+    key = ( dataset.version, route, params_key( kwargs ) )
+    with _response_lock:
+        if key in _response_cache:
+            _response_cache.move_to_end( key )
+            return _response_cache[key]
+
+    body = to_json( ROUTES[route][0]( dataset, **kwargs ) ).encode( 'utf-8' )
+    response = ( body, response_etag( dataset.version, route, key[2] ) )
+
+    with _response_lock:
+        _response_cache[key] = response
+        total = sum( len( value[0] ) for value in _response_cache.values() )
+        while total > MAX_CACHED_RESPONSE_BYTES and len( _response_cache ) > 1:
+            total -= len( _response_cache.popitem( last=False )[1][0] )
+    return response
+
+# -----------------------------------------------------------------------------------------------
+def json_response( status, payload, headers=None ):
+    body = json.dumps( payload, ensure_ascii=False ).encode( 'utf-8' )
+    return status, { 'Content-Type': 'application/json; charset=utf-8', **( headers or {} ) }, body
+
+# -----------------------------------------------------------------------------------------------
+def handle_request( method, target, headers=None, path=DATA_PATH ):
+    """ Responde uma requisição da API sobre o dataset compartilhado do processo (get_dataset)
+
+        Rotas: /countries, /cities, /cuisines, /restaurants e /home (ver ROUTES) e /health.
+        Com If-None-Match igual ao ETag atual a resposta é 304 sem corpo.
+
+        Input: método, caminho com query string, cabeçalhos (chaves em minúsculas), caminho do CSV
+        Output: ( status, cabeçalhos, corpo em bytes )
+    """
+    headers = headers or {}
+    if method not in ( 'GET', 'HEAD' ):
+        return json_response( HTTPStatus.METHOD_NOT_ALLOWED, { 'error': f'Método não suportado: {method}' },
+                              { 'Allow': 'GET, HEAD' } )
+
+    url = urlsplit( target )
+    dataset = get_dataset( path )
+    if url.path == '/health':
+        return json_response( HTTPStatus.OK, { 'status': 'ok', 'version': dataset.version, 'rows': len( dataset.df ) } )
+    if url.path not in ROUTES:
+        return json_response( HTTPStatus.NOT_FOUND, { 'error': f'Rota desconhecida: {url.path}', 'routes': sorted( ROUTES ) } )
+
+    try:
+        body, etag = cached_response( dataset, url.path, parse_params( url.path, url.query ) )
+    except ( ValueError, TypeError ) as error:
+        return json_response( HTTPStatus.BAD_REQUEST, { 'error': str( error ) } )
+
+    response_headers = { 'Content-Type': 'application/json; charset=utf-8', 'ETag': etag, 'Cache-Control': 'no-cache' }
+    if etag in [tag.strip() for tag in headers.get( 'if-none-match', '' ).split( ',' )]:
+        return HTTPStatus.NOT_MODIFIED, response_headers, b''
+    return HTTPStatus.OK, response_headers, body
+
+
+# =======================================
+# Servidor HTTP assíncrono (uma requisição por conexão)
+# =======================================
+
+def parse_head( head ):
+    """ Linha de requisição e cabeçalhos (chaves em minúsculas) do cabeçalho HTTP """
+    request_line, *lines = head.decode( 'latin-1' ).split( '\r\n' )
+    method, target, _ = request_line.split( ' ', 2 )
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition( ':' )
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+# -----------------------------------------------------------------------------------------------
+async def handle_connection( reader, writer, path=DATA_PATH ):
+    """ Lê a requisição, responde pelo handle_request numa thread (a consulta e a primeira carga
+        do dataset não travam o loop) e fecha a conexão """
+    try:
+        try:
+            head = await reader.readuntil( b'\r\n\r\n' )
+            method, target, headers = parse_head( head[:-4] )
+        except ( asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError ):
+            status, response_headers, body = json_response( HTTPStatus.BAD_REQUEST, { 'error': 'Requisição inválida' } )
+            method = 'GET'
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                status, response_headers, body = await loop.run_in_executor( None, handle_request, method, target, headers, path )
+            except Exception:
+                # erro não previsto na consulta: responde 500 em vez de fechar a conexão sem resposta
+                traceback.print_exc()
+                status, response_headers, body = json_response( HTTPStatus.INTERNAL_SERVER_ERROR, { 'error': 'Erro interno' } )
+
+        lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Content-Length: {len( body )}', 'Connection: close']
+        lines += [f'{name}: {value}' for name, value in response_headers.items()]
+        writer.write( ( '\r\n'.join( lines ) + '\r\n\r\n' ).encode( 'latin-1' ) )
+        if method != 'HEAD':
+            writer.write( body )
+        await writer.drain()
+    finally:
+        writer.close()
+
+# -----------------------------------------------------------------------------------------------
+async def serve( host='127.0.0.1', port=API_PORT, path=DATA_PATH ):
+    """ Sobe a API em host:port e atende até ser interrompida """
+    server = await asyncio.start_server( lambda reader, writer: handle_connection( reader, writer, path ),
+                                         host, port, limit=MAX_HEADER_BYTES )
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    # API JSON: python -m fome_zero.api [porta] [caminho do csv]
+    import sys
+
+    port = int( sys.argv[1] ) if len( sys.argv ) > 1 else API_PORT
+    path = sys.argv[2] if len( sys.argv ) > 2 else DATA_PATH
+    get_dataset( path )
+    print( f'API em http://127.0.0.1:{port} (rotas: {", ".join( sorted( ROUTES ) )}, /health)' )
+    asyncio.run( serve( port=port, path=path ) )
@@ -0,0 +1,259 @@
+# Libraries
+import argparse
+import ast
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import folium
+import numpy as np
+import pandas as pd
+
+from fome_zero.aggregates import (aggregate_state, cuisine_top_index, dataset_aggregate, diverse_countries, home_metrics,
+                                  select_countries, top_restaurants_merge)
+from fome_zero.clusters import SERVER_CLUSTER_MIN_POINTS, WORLD_BOUNDS, cluster_pyramid, viewport_clusters, viewport_layer
+from fome_zero.cuisines import cuisine_membership
+from fome_zero.data import DATA_PATH, Dataset, clean_code
+from fome_zero.filters import select
+from fome_zero.maps import map_html, map_points
+from fome_zero.schema import apply_schema
+
+
+ROOT = os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) )
+
+# Tamanhos padrão; 10M linhas pede mais de 10 GB de memória e só roda com --sizes all
+SIZES = [10_000, 100_000, 1_000_000]
+ALL_SIZES = SIZES + [10_000_000]
+
+# Seleção padrão das páginas
+PAISES = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+CUISINES = ['Home-made', 'BBQ', 'Japanese', 'Brazilian', 'Arabian', 'American', 'Italian']
+QTDE_REST = 10
+
+# Regressão: mais lento (ou mais memória) que a baseline além do limite relativo e do mínimo
+# absoluto (abaixo disso é ruído de medição)
+THRESHOLD = 0.25
+MIN_DELTA_SECONDS = 0.02
+MIN_DELTA_MB = 1.0
+
+
+# =======================================
+# Dados sintéticos
+# =======================================
+
+def synthetic_raw( n_rows, seed=0, raw=None ):
+    """ Dataframe bruto no formato do zomato.csv com n_rows linhas
+
+        As linhas são sorteadas (com reposição) do zomato.csv, então as distribuições
+        conjuntas de país, culinária, faixa de preço e cor da nota são as reais. Cada linha
+        ganha um Restaurant ID novo, o nome recebe o número da rodada de sorteio (os nomes
+        distintos crescem com o tamanho) e a posição um deslocamento pequeno. A mesma fração
+        de linhas repetidas do arquivo real é refeita copiando linhas anteriores.
+
+        Input: quantidade de linhas, semente, Dataframe bruto de origem (padrão: zomato.csv)
+        Output: Dataframe bruto
+    """
+    raw = pd.read_csv( DATA_PATH ) if raw is None else raw
+    rng = np.random.default_rng( seed )
+    duplicate_fraction = float( raw.duplicated().mean() )
+
+    df = raw.iloc[rng.integers( 0, len( raw ), n_rows )].reset_index( drop=True )
+    df['Restaurant ID'] = np.arange( 1, n_rows + 1 )
+    rounds = pd.Series( np.arange( n_rows ) // len( raw ) ).astype( str )
+    df['Restaurant Name'] = df['Restaurant Name'].where( rounds == '0', df['Restaurant Name'] + ' #' + rounds )
+    df['Latitude'] = df['Latitude'] + rng.uniform( -0.01, 0.01, n_rows )
+    df['Longitude'] = df['Longitude'] + rng.uniform( -0.01, 0.01, n_rows )
+
+    duplicates = np.flatnonzero( rng.random( n_rows ) < duplicate_fraction )
+    duplicates = duplicates[duplicates > 0]
+    sources = ( rng.random( len( duplicates ) ) * duplicates ).astype( np.int64 )
+    df.iloc[duplicates] = df.iloc[sources].to_numpy()
+    return df
+
+# -----------------------------------------------------------------------------------------------
+def page_functions( path, **page_globals ):
+    """ Funções de uma página do Streamlit sem rodar o script da página: só os imports e as
+        definições de função são executados
+
+        Input: caminho da página, globais que as funções leem da página (ex.: qtde_rest)
+        Output: dicionário com os nomes definidos
+    """
+    with open( path, encoding='utf-8' ) as f:
+        tree = ast.parse( f.read(), path )
+    body = [node for node in tree.body if isinstance( node, ( ast.Import, ast.ImportFrom, ast.FunctionDef ) )]
+    namespace = dict( page_globals )
+    exec( compile( ast.Module( body=body, type_ignores=[] ), path, 'exec' ), namespace )
+    return namespace
+
+
+# =======================================
+# Caminhos medidos
+# =======================================
+
+def home_map( dataset ):
+    """ Mapa do Home como a página monta: HTML do folium ou clusters calculados no servidor """
+    points = dataset.derived( 'map_points', map_points )
+    if points['country_name'].isin( PAISES ).sum() < SERVER_CLUSTER_MIN_POINTS:
+        return map_html( dataset, PAISES )
+    pyramid = dataset.derived( 'cluster_pyramid', lambda df: cluster_pyramid( points ) )
+    view = viewport_clusters( pyramid, PAISES, WORLD_BOUNDS, 1 )
+    return folium.Map( zoom_start=1 ).add_child( viewport_layer( pyramid, view ) ).get_root().render()
+
+# -----------------------------------------------------------------------------------------------
+def hot_paths():
+    """ Caminhos medidos sobre o dataset tratado: nome -> função( dataset )
+
+        O estado agregado já vem pronto no cache do Dataset (ele é medido à parte, em
+        aggregate_state); o resto do que cada página calcula a partir dele roda a frio.
+    """
+    paises = page_functions( os.path.join( ROOT, 'pages', '1_Paises.py' ) )
+    cidades = page_functions( os.path.join( ROOT, 'pages', '2_Cidades.py' ) )
+    cozinhas = page_functions( os.path.join( ROOT, 'pages', '3_Cozinhas.py' ), qtde_rest=QTDE_REST )
+
+    def country_chart( fn ):
+        return lambda ds: fn( select_countries( dataset_aggregate( ds, 'country_cube' ), PAISES ) )
+
+    def city_chart( fn ):
+        return lambda ds: fn( dataset_aggregate( ds, 'city_index' ), PAISES )
+
+    def top_restaurants( ds ):
+        catalog = dataset_aggregate( ds, 'cuisine_catalog' )
+        df_top = top_restaurants_merge( ds.derived( 'cuisine_top_index', cuisine_top_index ),
+                                        diverse_countries( catalog, PAISES, QTDE_REST ), CUISINES, max( QTDE_REST, 5 ) )
+        return cozinhas['top_restaurants']( df_top, QTDE_REST )
+
+    paths = { 'aggregate_state': lambda ds: aggregate_state( ds.df ) }
+    for name in ['restaurant_of_country', 'city_of_country', 'mean_votes_of_country', 'mean_price_of_country']:
+        paths[f'paises.{name}'] = country_chart( paises[name] )
+    for name in ['restaurant_of_city', 'restaurant_of_city_media_maior', 'restaurant_of_city_media_menor', 'city_cuisines']:
+        paths[f'cidades.{name}'] = city_chart( cidades[name] )
+    paths['cozinhas.top_restaurants'] = top_restaurants
+    paths['cozinhas.top_cuisines'] = lambda ds: cozinhas['top_cuisines']( dataset_aggregate( ds, 'cuisine_ratings' ), False )
+    paths['home.metrics'] = lambda ds: home_metrics( select( ds, PAISES ),
+                                                     ds.derived( 'cuisine_membership', cuisine_membership ) )
+    paths['home.map'] = home_map
+    return paths
+
+# -----------------------------------------------------------------------------------------------
+def measure( fn, repeat ):
+    """ Menor tempo entre repeat execuções e pico de memória (tracemalloc) de uma execução à parte
+
+        Como no timeit, o coletor de lixo fica desligado durante cada execução medida.
+
+        Input: função sem argumentos (cada chamada precisa partir do mesmo estado), repetições
+        Output: dicionário com seconds e peak_mb
+    """
+    seconds = []
+    for _ in range( repeat ):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            seconds.append( time.perf_counter() - start )
+        finally:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return { 'seconds': round( min( seconds ), 6 ), 'peak_mb': round( peak / 2 ** 20, 3 ) }
+
+# -----------------------------------------------------------------------------------------------
+def run_benchmarks( sizes=SIZES, repeat=5, paths=None, log=print ):
+    """ Mede clean_code e os caminhos de hot_paths em cada tamanho de dataset sintético
+
+        Cada execução recebe um Dataset novo (versão própria, cache só com o estado agregado),
+        então os caches de processo (linhas, mapas) não mascaram o cálculo.
+
+        Input: tamanhos, repetições, nomes dos caminhos (None = todos), função de log
+        Output: dicionário {tamanho: {caminho: {seconds, peak_mb}}}
+    """
+    raw_source = pd.read_csv( DATA_PATH )
+    selected = hot_paths()
+    if paths is not None:
+        selected = { name: fn for name, fn in selected.items() if name in paths }
+
+    results = {}
+    for n_rows in sizes:
+        raw = synthetic_raw( n_rows, raw=raw_source )
+        size_results = { 'clean_code': measure( lambda: apply_schema( clean_code( raw ) ), repeat ) }
+        df = apply_schema( clean_code( raw ) )
+        del raw
+        state = aggregate_state( df )
+        log( f"{n_rows:>10} {'clean_code':<40} {size_results['clean_code']['seconds']:9.4f} s "
+             f"{size_results['clean_code']['peak_mb']:9.1f} MB" )
+
+        runs = iter( range( 10 ** 9 ) )
+        for name, fn in selected.items():
+            fresh = lambda: Dataset( df, f'bench-{n_rows}-{next( runs )}', 0, 0, { 'aggregate_state': state } )
+            size_results[name] = measure( lambda: fn( fresh() ), repeat )
+            log( f"{n_rows:>10} {name:<40} {size_results[name]['seconds']:9.4f} s {size_results[name]['peak_mb']:9.1f} MB" )
+        results[str( n_rows )] = size_results
+    return results
+
+# -----------------------------------------------------------------------------------------------
+def compare( results, baseline, threshold=THRESHOLD ):
+    """ Caminhos que pioraram em relação à baseline (tempo ou pico de memória)
+
+        Input: resultados, baseline (mesmo formato), limite relativo
+        Output: lista de textos, um por regressão (vazia = sem regressões)
+    """
+    regressions = []
+    for size, paths in results.items():
+        for name, current in paths.items():
+            base = baseline.get( size, {} ).get( name )
+            if base is None:
+                continue
+            for metric, min_delta, unit in [( 'seconds', MIN_DELTA_SECONDS, 's' ), ( 'peak_mb', MIN_DELTA_MB, 'MB' )]:
+                delta = current[metric] - base[metric]
+                if delta > min_delta and current[metric] > base[metric] * ( 1 + threshold ):
+                    regressions.append( f'{size} {name}: {metric} {base[metric]:.4f} -> {current[metric]:.4f} {unit} '
+                                        f'(+{delta / max( base[metric], 1e-12 ):.0%})' )
+    return regressions
+
+# -----------------------------------------------------------------------------------------------
+def environment():
+    """ Versões e máquina em que a baseline foi medida (comparar só entre ambientes iguais) """
+    return { 'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+             'machine': platform.machine(), 'processor': platform.processor(), 'cpus': os.cpu_count() }
+
+
+if __name__ == '__main__':
+    # Benchmark: python -m fome_zero.bench [--sizes 10000,100000] [--save baseline.json] [--compare baseline.json]
+    parser = argparse.ArgumentParser( description='Benchmark dos caminhos quentes sobre datasets sintéticos' )
+    parser.add_argument( '--sizes', default=','.join( map( str, SIZES ) ),
+                         help=f"tamanhos separados por vírgula ou 'all' ({','.join( map( str, ALL_SIZES ) )})" )
+    parser.add_argument( '--repeat', type=int, default=5 )
+    parser.add_argument( '--paths', help='caminhos separados por vírgula (padrão: todos)' )
+    parser.add_argument( '--save', help='grava os resultados como baseline neste JSON' )
+    parser.add_argument( '--compare', help='baseline JSON; sai com código 1 se algum caminho regredir' )
+    parser.add_argument( '--threshold', type=float, default=THRESHOLD )
+    args = parser.parse_args()
+
+    sizes = ALL_SIZES if args.sizes == 'all' else [int( size ) for size in args.sizes.split( ',' )]
+    results = run_benchmarks( sizes, args.repeat, args.paths.split( ',' ) if args.paths else None )
+
+    if args.save:
+        with open( args.save, 'w', encoding='utf-8' ) as f:
+            json.dump( { 'environment': environment(), 'results': results }, f, indent=2 )
+        print( f'baseline gravada em {args.save}' )
+
+    if args.compare:
+        with open( args.compare, encoding='utf-8' ) as f:
+            baseline = json.load( f )
+        if baseline.get( 'environment' ) != environment():
+            print( 'aviso: baseline medida em outro ambiente', baseline.get( 'environment' ) )
+        regressions = compare( results, baseline['results'], args.threshold )
+        for regression in regressions:
+            print( f'REGRESSÃO {regression}' )
+        if regressions:
+            sys.exit( 1 )
+        print( f'sem regressões acima de {args.threshold:.0%}' )
@@ -0,0 +1,143 @@
+# Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from fome_zero.cuisines import cuisine_membership
+
+
+# Colunas com índice invertido (valor -> bitmap das linhas)
+BITMAP_COLUMNS = ['country_name', 'cuisines', 'price_range_name', 'color_name']
+
+# Quantidade de bits 1 em cada byte (popcount por tabela)
+_POPCOUNT = np.array( [bin( i ).count( '1' ) for i in range( 256 )], dtype=np.uint8 )
+
+# n_rows: linhas do dataframe indexado; bitmaps: {coluna: {valor: bitmap}}, cada bitmap é
+# um array uint8 com um bit por linha (np.packbits)
+BitmapIndex = namedtuple( 'BitmapIndex', ['n_rows', 'bitmaps'] )
+
+
+# =======================================
+# Funções
+# =======================================
+
+def postings( df, column ):
+    """ Pares (linha, código do valor) da coluna e os valores; culinárias vêm da lista completa
+        de cada restaurante (all_cuisines), então uma linha pode aparecer em várias culinárias
+
+        Input: Dataframe, coluna
+        Output: (posições das linhas, códigos, valores)
+    """
+    if column == 'cuisines' and 'all_cuisines' in df.columns:
+        membership = cuisine_membership( df )
+        return membership.rows, membership.indices, membership.names
+
+    codes, uniques = pd.factorize( df[column], sort=True )
+    present = codes >= 0
+    return np.flatnonzero( present ), codes[present], uniques
+
+# -----------------------------------------------------------------------------------------------
+def bitmap_index( df, columns=BITMAP_COLUMNS ):
+    """ Índice invertido valor -> bitmap de linhas, calculado uma vez a partir do dataframe
+
+        Os pares (linha, valor) são agrupados por valor com um único argsort por coluna; o
+        bitmap de cada valor é montado a partir das suas linhas.
+
+        Input: Dataframe tratado, colunas indexadas
+        Output: BitmapIndex
+    """
+    n_rows = len( df )
+    bitmaps = {}
+    for column in columns:
+        rows, codes, uniques = postings( df, column )
+        rows = rows[np.argsort( codes, kind='stable' )]
+        bounds = np.r_[0, np.cumsum( np.bincount( codes, minlength=len( uniques ) ) )]
+
+        bits = np.zeros( n_rows, dtype=bool )
+        bitmaps[column] = {}
+        for code, value in enumerate( uniques ):
+            selected = rows[bounds[code]:bounds[code + 1]]
+            bits[selected] = True
+            bitmaps[column][str( value )] = np.packbits( bits )
+            bits[selected] = False
+    return BitmapIndex( n_rows, bitmaps )
+
+# -----------------------------------------------------------------------------------------------
+def empty_bitmap( index, fill=False ):
+    """ Bitmap sem nenhuma linha (ou com todas, fill=True) """
+    if not fill:
+        return np.zeros( ( index.n_rows + 7 ) // 8, dtype=np.uint8 )
+    return np.packbits( np.ones( index.n_rows, dtype=bool ) )
+
+# -----------------------------------------------------------------------------------------------
+def union( index, column, values ):
+    """ Bitmap das linhas com qualquer um dos valores (OR); valores fora do índice são ignorados """
+    bitmaps = index.bitmaps[column]
+    selected = [bitmaps[value] for value in values if value in bitmaps]
+    if not selected:
+        return empty_bitmap( index )
+    return np.bitwise_or.reduce( selected ) if len( selected ) > 1 else selected[0].copy()
+
+# -----------------------------------------------------------------------------------------------
+def query_bitmap( index, **filters ):
+    """ Bitmap das linhas que atendem a todos os filtros (AND entre colunas, OR dentro de cada uma)
+
+        Input: BitmapIndex, coluna=lista de valores (None = sem filtro na coluna)
+        Output: bitmap
+    """
+    result = None
+    for column, values in filters.items():
+        if values is None:
+            continue
+        selected = union( index, column, values )
+        result = selected if result is None else np.bitwise_and( result, selected, out=result )
+    return empty_bitmap( index, fill=True ) if result is None else result
+
+# -----------------------------------------------------------------------------------------------
+def to_mask( index, bitmap ):
+    """ Bitmap -> array booleano com uma posição por linha """
+    return np.unpackbits( bitmap, count=index.n_rows ).view( bool )
+
+# -----------------------------------------------------------------------------------------------
+def to_rows( index, bitmap ):
+    """ Bitmap -> posições (iloc) das linhas """
+    return np.flatnonzero( to_mask( index, bitmap ) )
+
+# -----------------------------------------------------------------------------------------------
+def count( bitmap ):
+    """ Quantidade de linhas no bitmap (popcount) """
+    return int( _POPCOUNT[bitmap].sum( dtype=np.int64 ) )
+
+
+if __name__ == '__main__':
+    # Benchmark contra o caminho isin: python -m fome_zero.bitmaps [réplicas do dataset]
+    import sys
+    import timeit
+    from fome_zero.cuisines import rows_with_cuisines
+    from fome_zero.data import get_dataset
+
+    df = get_dataset().df
+    replicas = int( sys.argv[1] ) if len( sys.argv ) > 1 else 100
+    df = pd.concat( [df] * replicas, ignore_index=True )
+    index = bitmap_index( df )
+    membership = cuisine_membership( df )
+
+    paises = ['Brazil', 'England', 'Qatar', 'South Africa', 'Canada', 'Australia']
+    cuisines = ['Home-made', 'BBQ', 'Japanese', 'Brazilian', 'Arabian', 'American', 'Italian']
+    cases = {
+        'países': ( lambda: np.flatnonzero( df['country_name'].isin( paises ).to_numpy() ),
+                    lambda: to_rows( index, query_bitmap( index, country_name=paises ) ) ),
+        'países + culinárias': ( lambda: np.flatnonzero( df['country_name'].isin( paises ).to_numpy()
+                                                         & rows_with_cuisines( membership, cuisines, len( df ) ) ),
+                                 lambda: to_rows( index, query_bitmap( index, country_name=paises, cuisines=cuisines ) ) ),
+        'contagem': ( lambda: int( df['country_name'].isin( paises ).sum() ),
+                      lambda: count( query_bitmap( index, country_name=paises ) ) ),
+    }
+
+    print( f'{len( df )} linhas' )
+    for name, ( isin_path, bitmap_path ) in cases.items():
+        assert np.array_equal( isin_path(), bitmap_path() )
+        isin_ms = min( timeit.repeat( isin_path, number=5, repeat=3 ) ) / 5 * 1e3
+        bitmap_ms = min( timeit.repeat( bitmap_path, number=5, repeat=3 ) ) / 5 * 1e3
+        print( f'{name:<22} isin {isin_ms:8.2f} ms   bitmap {bitmap_ms:8.2f} ms   ({isin_ms / bitmap_ms:.1f}x)' )
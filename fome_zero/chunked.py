@@ -0,0 +1,153 @@
+# Libraries
+import os
+
+import numpy as np
+import pandas as pd
+
+from fome_zero import snapshot
+from fome_zero.data import DATA_PATH, clean_columns, file_hash
+from fome_zero.schema import dtype_plan
+
+try:
+    import pyarrow as pa
+except ImportError:  # o modo em pedaços grava Arrow IPC e exige pyarrow
+    pa = None
+
+
+# Linhas do CSV lidas e limpas por vez; a memória de pico acompanha este valor
+CHUNK_ROWS = 100_000
+
+
+# =======================================
+# Funções
+# =======================================
+
+def encode_chunk( df, categories ):
+    """ Aplica o schema compacto ao pedaço com categorias estáveis entre pedaços
+
+        As categorias de cada coluna são as já vistas nos pedaços anteriores, com as novas
+        acrescentadas no fim: o dicionário de um pedaço só estende o do anterior (delta de
+        dicionário no Arrow IPC) e os códigos já gravados continuam válidos.
+
+        Input: Dataframe do pedaço (saída de clean_columns), {coluna: categorias já vistas}
+        Output: Dataframe
+    """
+    plan = dtype_plan( df )
+    df = df.astype( { col: dtype for col, dtype in plan.items() if dtype != 'category' } )
+    for col in [col for col, dtype in plan.items() if dtype == 'category']:
+        known = categories.get( col, pd.Index( [], dtype=object ) )
+        categories[col] = known.append( pd.Index( df[col].unique() ).difference( known, sort=False ) )
+        df[col] = pd.Categorical( df[col], categories=categories[col] )
+
+    # o índice (linha do CSV) é gravado como coluna, como no snapshot
+    df.index = df.index.astype( 'int64' )
+    return df
+
+# -----------------------------------------------------------------------------------------------
+def arrow_schema( df ):
+    """ Schema Arrow fixo para todos os pedaços: dicionários com índice int32 (o tipo do código
+        do pandas varia com a quantidade de categorias) e texto mesmo em pedaço vazio """
+    schema = pa.Schema.from_pandas( df, preserve_index=True )
+    for i, field in enumerate( schema ):
+        if pa.types.is_dictionary( field.type ):
+            schema = schema.set( i, field.with_type( pa.dictionary( pa.int32(), pa.string() ) ) )
+        elif pa.types.is_null( field.type ):
+            schema = schema.set( i, field.with_type( pa.string() ) )
+    return schema
+
+# -----------------------------------------------------------------------------------------------
+def _ipc_writer( path, schema ):
+    return pa.ipc.new_file( path, schema, options=pa.ipc.IpcWriteOptions( emit_dictionary_deltas=True ) )
+
+# -----------------------------------------------------------------------------------------------
+def _stage_chunks( path, stage_path, chunk_rows ):
+    # passo 1: etapas 1 a 7 e 9 por pedaço; retorna o schema e as posições (no arquivo
+    # intermediário) da última linha de cada restaurant_id, em ordem
+    last_row = {}
+    categories = {}
+    schema = None
+    writer = None
+    n_rows = 0
+    try:
+        for chunk in pd.read_csv( path, chunksize=chunk_rows ):
+            df_aux = clean_columns( chunk )
+            df_aux = df_aux.loc[df_aux.average_cost_for_two!=0, :]
+            df_aux = encode_chunk( df_aux, categories )
+
+            if writer is None:
+                schema = arrow_schema( df_aux )
+                writer = _ipc_writer( stage_path, schema )
+            writer.write_batch( pa.RecordBatch.from_pandas( df_aux, schema=schema, preserve_index=True ) )
+
+            ids = df_aux['restaurant_id'].to_numpy()
+            last_row.update( zip( ids.tolist(), range( n_rows, n_rows + len( ids ) ) ) )
+            n_rows += len( ids )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if schema is None:
+        raise ValueError( f'CSV sem linhas de dados: {path}' )
+    return schema, np.sort( np.fromiter( last_row.values(), dtype=np.int64, count=len( last_row ) ) )
+
+# -----------------------------------------------------------------------------------------------
+def clean_chunked( path=DATA_PATH, out_path=None, chunk_rows=CHUNK_ROWS ):
+    """ Limpeza do CSV em pedaços de tamanho fixo, com o resultado gravado aos poucos em Feather
+
+        Passo 1: cada pedaço passa pelas etapas por linha (clean_columns), as linhas de valor
+        zerado (etapa 9) saem e o pedaço é gravado num arquivo intermediário.
+        Passo 2: o intermediário é relido via memory-map, um lote por vez, mantendo só a última
+        linha de cada restaurant_id (etapa 10). Cópias exatas têm o mesmo restaurant_id e a
+        etapa 8 mantém a última delas, então a etapa 10 já cobre a 8.
+
+        A memória de pico é a de um pedaço mais o mapa restaurant_id -> última posição, bem
+        menor que o dataframe bruto. O resultado tem as mesmas linhas e valores de apply_schema( clean_code( ... ) )
+        e é um snapshot válido (formato e versão de write_snapshot): com out_path padrão,
+        get_dataset o carrega sem reler o CSV.
+
+        Input: caminho do CSV, caminho de saída (padrão: o snapshot do CSV), linhas por pedaço
+        Output: (caminho de saída, linhas gravadas)
+    """
+    if pa is None:
+        raise ImportError( 'o modo em pedaços exige pyarrow' )
+
+    path = os.path.abspath( path )
+    out_path = snapshot.snapshot_path( path ) if out_path is None else out_path
+    stage_path = f'{out_path}.{os.getpid()}.stage.tmp'
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    version = file_hash( path )
+
+    try:
+        schema, keep_rows = _stage_chunks( path, stage_path, chunk_rows )
+
+        # passo 2: etapa 10 (keep_rows está ordenado, então cada lote pega uma fatia contínua)
+        schema = schema.with_metadata( snapshot.snapshot_metadata( schema, version ) )
+        with pa.memory_map( stage_path ) as source, _ipc_writer( tmp_path, schema ) as writer:
+            reader = pa.ipc.open_file( source )
+            start = 0
+            for i in range( reader.num_record_batches ):
+                batch = reader.get_batch( i )
+                lo, hi = np.searchsorted( keep_rows, [start, start + batch.num_rows] )
+                mask = np.zeros( batch.num_rows, dtype=bool )
+                mask[keep_rows[lo:hi] - start] = True
+                writer.write_batch( batch.filter( pa.array( mask ) ) )
+                start += batch.num_rows
+
+        os.replace( tmp_path, out_path )
+    finally:
+        for leftover in [stage_path, tmp_path]:
+            if os.path.exists( leftover ):
+                os.remove( leftover )
+
+    return out_path, len( keep_rows )
+
+
+if __name__ == '__main__':
+    # Limpeza em pedaços: python -m fome_zero.chunked [caminho do csv] [saída] [linhas por pedaço]
+    import sys
+
+    args = sys.argv[1:]
+    out_path, n_rows = clean_chunked( args[0] if len( args ) > 0 else DATA_PATH,
+                                      args[1] if len( args ) > 1 else None,
+                                      int( args[2] ) if len( args ) > 2 else CHUNK_ROWS )
+    print( f'{out_path}: {n_rows} linhas' )
@@ -0,0 +1,168 @@
+# Libraries
+import html
+from collections import namedtuple
+
+import folium
+import numpy as np
+import pandas as pd
+
+
+# Acima deste zoom o mapa recebe os restaurantes individuais em vez de clusters
+MAX_CLUSTER_ZOOM = 12
+
+# Cada tile (256px) é dividido em 2**CELL_BITS x 2**CELL_BITS células (64px)
+CELL_BITS = 2
+
+# Limite de restaurantes individuais enviados de uma vez; acima disso seguem os clusters
+MAX_POINTS = 2000
+
+# A partir desta quantidade de restaurantes selecionados o Home usa o agrupamento no servidor
+SERVER_CLUSTER_MIN_POINTS = 20000
+
+WORLD_BOUNDS = ( -85.0, -180.0, 85.0, 180.0 )
+
+# points: pontos do mapa (map_points) com x/y de Mercator; levels[z]: células do zoom z
+ClusterPyramid = namedtuple( 'ClusterPyramid', ['points', 'levels', 'colors'] )
+
+
+# =======================================
+# Funções
+# =======================================
+
+def mercator( lat, lon ):
+    """ Coordenadas normalizadas (0..1) de Web Mercator """
+    lat = np.clip( np.asarray( lat, dtype='float64' ), -85.05112878, 85.05112878 )
+    x = ( np.asarray( lon, dtype='float64' ) + 180.0 ) / 360.0
+    sin = np.sin( np.radians( lat ) )
+    y = 0.5 - np.log( ( 1 + sin ) / ( 1 - sin ) ) / ( 4 * np.pi )
+    return np.clip( x, 0.0, 1.0 - 1e-12 ), np.clip( y, 0.0, 1.0 - 1e-12 )
+
+# -----------------------------------------------------------------------------------------------
+def cluster_pyramid( points ):
+    """ Pré-agrega os restaurantes em uma grade por nível de zoom (0..MAX_CLUSTER_ZOOM)
+
+        Cada nível guarda, por (país, célula): quantidade, soma de latitude/longitude (para o
+        centróide), a primeira linha (para células com um só restaurante) e a contagem por cor.
+        Células de países diferentes são somadas na consulta, então qualquer seleção de países
+        é respondida pelo mesmo nível.
+
+        Input: Dataframe de pontos (maps.map_points)
+        Output: ClusterPyramid
+    """
+    points = points.reset_index( drop=True )
+    x, y = mercator( points['latitude'], points['longitude'] )
+    colors = sorted( points['color_name'].astype( str ).unique() )
+    color_dummies = pd.get_dummies( pd.Categorical( points['color_name'].astype( str ), categories=colors ) ).to_numpy( dtype='int64' )
+
+    levels = []
+    for zoom in range( MAX_CLUSTER_ZOOM + 1 ):
+        scale = 2 ** ( zoom + CELL_BITS )
+        cells = pd.DataFrame( {
+            'country_name': points['country_name'].astype( str ),
+            'cx': ( x * scale ).astype( 'int64' ),
+            'cy': ( y * scale ).astype( 'int64' ),
+            'count': 1,
+            'lat_sum': points['latitude'].to_numpy( dtype='float64' ),
+            'lon_sum': points['longitude'].to_numpy( dtype='float64' ),
+            'first_row': np.arange( len( points ) ),
+        } )
+        cells = pd.concat( [cells, pd.DataFrame( color_dummies, columns=colors )], axis=1 )
+        aggregations = { col: 'sum' for col in ['count', 'lat_sum', 'lon_sum'] + colors }
+        aggregations['first_row'] = 'min'
+        levels.append( cells.groupby( ['country_name', 'cx', 'cy'], sort=True ).agg( aggregations ).reset_index() )
+
+    return ClusterPyramid( points.assign( x=x, y=y ), levels, colors )
+
+# -----------------------------------------------------------------------------------------------
+def parse_bounds( bounds ):
+    """ Converte os limites do st_folium ({'_southWest': .., '_northEast': ..}) em (sul, oeste, norte, leste) """
+    if not bounds or not bounds.get( '_southWest' ) or bounds['_southWest'].get( 'lat' ) is None:
+        return WORLD_BOUNDS
+    south, west = bounds['_southWest']['lat'], bounds['_southWest']['lng']
+    north, east = bounds['_northEast']['lat'], bounds['_northEast']['lng']
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west = ( west + 180.0 ) % 360.0 - 180.0
+        east = ( east + 180.0 ) % 360.0 - 180.0
+    return south, west, north, east
+
+# -----------------------------------------------------------------------------------------------
+def _in_x_range( x, x0, x1 ):
+    # a janela pode cruzar o antimeridiano (x0 > x1)
+    if x0 <= x1:
+        return ( x >= x0 ) & ( x <= x1 )
+    return ( x >= x0 ) | ( x <= x1 )
+
+# -----------------------------------------------------------------------------------------------
+def viewport_clusters( pyramid, paises, bounds, zoom ):
+    """ Clusters e restaurantes visíveis na janela do mapa para os países selecionados
+
+        Input: ClusterPyramid, lista de países, (sul, oeste, norte, leste), zoom do mapa
+        Output: Dataframe com latitude, longitude, count, color_name e row (linha em
+                pyramid.points para clusters de um só restaurante; -1 nos demais)
+    """
+    south, west, north, east = bounds
+    x0, y1 = mercator( south, west )
+    x1, y0 = mercator( north, east )
+    zoom = max( int( zoom ), 0 )
+
+    if zoom > MAX_CLUSTER_ZOOM:
+        points = pyramid.points
+        mask = ( np.asarray( points['country_name'].isin( paises ) ) & _in_x_range( points['x'].to_numpy(), x0, x1 )
+                 & ( points['y'].to_numpy() >= y0 ) & ( points['y'].to_numpy() <= y1 ) )
+        if mask.sum() <= MAX_POINTS:
+            rows = np.flatnonzero( mask )
+            return pd.DataFrame( {
+                'latitude': points['latitude'].to_numpy()[rows],
+                'longitude': points['longitude'].to_numpy()[rows],
+                'count': 1,
+                'color_name': points['color_name'].astype( str ).to_numpy()[rows],
+                'row': rows,
+            } )
+        zoom = MAX_CLUSTER_ZOOM
+
+    scale = 2 ** ( zoom + CELL_BITS )
+    cells = pyramid.levels[zoom]
+    mask = ( np.asarray( cells['country_name'].isin( paises ) )
+             & _in_x_range( cells['cx'].to_numpy(), int( x0 * scale ), int( x1 * scale ) )
+             & ( cells['cy'].to_numpy() >= int( y0 * scale ) ) & ( cells['cy'].to_numpy() <= int( y1 * scale ) ) )
+    aggregations = { col: 'sum' for col in ['count', 'lat_sum', 'lon_sum'] + pyramid.colors }
+    aggregations['first_row'] = 'min'
+    cells = cells.loc[mask, :].groupby( ['cx', 'cy'], sort=False ).agg( aggregations )
+
+    return pd.DataFrame( {
+        'latitude': ( cells['lat_sum'] / cells['count'] ).to_numpy(),
+        'longitude': ( cells['lon_sum'] / cells['count'] ).to_numpy(),
+        'count': cells['count'].to_numpy(),
+        'color_name': np.asarray( pyramid.colors, dtype=object )[cells[pyramid.colors].to_numpy().argmax( axis=1 )] if len( cells ) else [],
+        'row': np.where( cells['count'].to_numpy() == 1, cells['first_row'].to_numpy(), -1 ),
+    } )
+
+# -----------------------------------------------------------------------------------------------
+def viewport_layer( pyramid, view ):
+    """ Camada folium com os clusters (círculo com a contagem) e restaurantes da janela
+
+        Input: ClusterPyramid, Dataframe de viewport_clusters
+        Output: folium.FeatureGroup
+    """
+    layer = folium.FeatureGroup( name='Restaurantes' )
+    points = pyramid.points
+    for lat, lon, count, color, row in view.itertuples( index=False ):
+        if row >= 0:
+            point = points.iloc[row]
+            popup_html = f'<div style="width: 250px;">' \
+                         f"<b>{html.escape( str( point['restaurant_name'] ) )}</b><br><br>" \
+                         f"Preço para dois: {point['average_cost_for_two']:.2f} ( {point['currency']})<br> " \
+                         f"Type: {point['cuisines']}<br>" \
+                         f"Nota: {point['aggregate_rating']}/5.0" \
+                         f'</div>'
+            folium.Marker( [lat, lon], popup=popup_html, tooltip='clique aqui',
+                           icon=folium.Icon( color=color, icon='home' ) ).add_to( layer )
+        else:
+            size = int( 30 + 10 * np.log10( count ) )
+            icon_html = ( f'<div style="width:{size}px;height:{size}px;line-height:{size}px;border-radius:50%;'
+                     f'background:{color};opacity:0.8;color:white;font-weight:bold;text-align:center;">{count}</div>' )
+            folium.Marker( [lat, lon], tooltip=f'{count} restaurantes',
+                           icon=folium.DivIcon( html=icon_html, icon_size=( size, size ), icon_anchor=( size // 2, size // 2 ) ) ).add_to( layer )
+    return layer
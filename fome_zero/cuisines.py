@@ -0,0 +1,72 @@
+# Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from fome_zero.data import split_cuisines
+
+
+# Relação restaurante <-> culinária em formato CSR: as culinárias da linha i do dataframe são
+# names[indices[indptr[i]:indptr[i + 1]]]; rows repete a posição da linha para cada par
+CuisineMembership = namedtuple( 'CuisineMembership', ['names', 'indptr', 'indices', 'rows'] )
+
+
+# =======================================
+# Funções
+# =======================================
+
+def cuisine_membership( df ):
+    """ Matriz esparsa (CSR) linha -> culinárias, calculada uma vez a partir do dataframe tratado
+
+        O split é feito só nas combinações distintas de all_cuisines; as linhas são montadas
+        repetindo o CSR de cada combinação, sem laço por linha.
+
+        Input: Dataframe tratado
+        Output: CuisineMembership
+    """
+    combo_codes, combos = pd.factorize( df['all_cuisines'].astype( str ) )
+    combo_tokens = [split_cuisines( combo ) for combo in combos]
+    names, token_codes = np.unique( np.array( [token for tokens in combo_tokens for token in tokens], dtype=object ),
+                                    return_inverse=True )
+
+    combo_lengths = np.array( [len( tokens ) for tokens in combo_tokens], dtype=np.int64 )
+    combo_indptr = np.r_[0, np.cumsum( combo_lengths )]
+
+    lengths = combo_lengths[combo_codes]
+    indptr = np.r_[0, np.cumsum( lengths )]
+    rows = np.repeat( np.arange( len( df ) ), lengths )
+    # posição de cada par dentro do CSR da combinação da sua linha
+    offsets = np.arange( indptr[-1] ) - indptr[:-1][rows] + combo_indptr[:-1][combo_codes][rows]
+    indices = token_codes[offsets].astype( np.int32 )
+
+    return CuisineMembership( names.astype( str ), indptr, indices, rows )
+
+# -----------------------------------------------------------------------------------------------
+def explode( df, membership, columns ):
+    """ Tabela longa com uma linha por (linha do dataframe, culinária)
+
+        Input: Dataframe tratado, CuisineMembership, colunas a repetir
+        Output: Dataframe com as colunas pedidas e 'cuisine' (categoria)
+    """
+    df_aux = df.loc[:, columns].iloc[membership.rows].reset_index( drop=True )
+    df_aux['cuisine'] = pd.Categorical.from_codes( membership.indices, categories=membership.names )
+    return df_aux
+
+# -----------------------------------------------------------------------------------------------
+def rows_with_cuisines( membership, cuisines, n_rows ):
+    """ Máscara das linhas que têm qualquer uma das culinárias """
+    selected = np.isin( membership.names, list( cuisines ) )
+    mask = np.zeros( n_rows, dtype=bool )
+    mask[membership.rows[selected[membership.indices]]] = True
+    return mask
+
+# -----------------------------------------------------------------------------------------------
+def distinct_cuisines( membership, rows=None ):
+    """ Quantidade de culinárias distintas nas linhas selecionadas (None = todas) """
+    indices = membership.indices
+    if rows is not None:
+        mask = np.zeros( len( membership.indptr ) - 1, dtype=bool )
+        mask[rows] = True
+        indices = indices[mask[membership.rows]]
+    return int( np.count_nonzero( np.bincount( indices, minlength=len( membership.names ) ) ) )
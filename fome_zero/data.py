@@ -0,0 +1,297 @@
+# Libraries
+import functools
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+import inflection
+import numpy as np
+import pandas as pd
+
+from fome_zero import snapshot
+from fome_zero.schema import apply_schema
+from fome_zero.timing import stage
+
+
+DATA_PATH = os.path.join( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ), 'zomato.csv' )
+
+
+# =======================================
+# Constantes da limpeza
+# =======================================
+
+COUNTRIES = {
+1: "India",
+14: "Australia",
+30: "Brazil",
+37: "Canada",
+94: "Indonesia",
+148: "New Zeland",
+162: "Philippines",
+166: "Qatar",
+184: "Singapure",
+189: "South Africa",
+191: "Sri Lanka",
+208: "Turkey",
+214: "United Arab Emirates",
+215: "England",
+216: "United States of America",
+}
+
+COLORS = {
+"3F7E00": "darkgreen",
+"5BA829": "green",
+"9ACD32": "lightgreen",
+"CDD614": "orange",
+"FFBA00": "red",
+"CBCBC8": "darkred",
+"FF7800": "darkred",
+}
+
+# Índice = faixa de preço (1, 2, 3); qualquer outro valor cai na posição 0
+PRICE_TYPES = np.array( ['gourmet', 'cheap', 'normal', 'expensive'], dtype=object )
+
+COLUMNS = ['restaurant_id', 'restaurant_name', 'city', 'address',
+   'locality', 'locality_verbose', 'longitude', 'latitude', 'cuisines',
+   'average_cost_for_two', 'currency', 'has_table_booking',
+   'has_online_delivery', 'is_delivering_now', 'aggregate_rating', 'rating_text',
+   'votes', 'country_name', 'price_range_name', 'color_name', 'all_cuisines']
+
+
+# =======================================
+# Funções
+# =======================================
+
+@functools.lru_cache( maxsize=None )
+def rename_columns( columns ):
+    """ Mapa nome original -> snake_case, calculado uma vez por conjunto de colunas
+
+        Input: tupla com os nomes das colunas
+        Output: dicionário {nome original: novo nome}
+    """
+    return { col: inflection.underscore( inflection.titleize( col ).replace( " ", "" ) ) for col in columns }
+
+# -----------------------------------------------------------------------------------------------
+def map_codes( series, mapping ):
+    """ Traduz os códigos da série pelo dicionário; códigos desconhecidos geram KeyError """
+    mapped = series.map( mapping )
+    unknown = mapped.isna()
+    if unknown.any():
+        raise KeyError( series[unknown].iloc[0] )
+    return mapped
+
+# -----------------------------------------------------------------------------------------------
+def split_cuisines( value ):
+    """ Culinárias de um valor do campo Cuisines ("Italian, Pizza" -> ['Italian', 'Pizza']) """
+    return [cuisine.strip() for cuisine in value.split( "," ) if cuisine.strip()]
+
+# -----------------------------------------------------------------------------------------------
+def clean_code( df ):
+    """ Esta funcao tem a responsabilidade de limpar o dataframe
+
+        Tipos de limpeza:
+        1. Preenchimento do nome dos países
+        2. Criação do Tipo de Categoria de Comida
+        3. Criação do nome das Cores
+        4. Renomear as colunas do DataFrame
+        5. Categorizar por tipo de culinária (a primeira) e guardar a lista completa
+        6. Selecionar somente algumas colunas
+        7. Excluir linhas com dados ausentes
+        8. Excluir linhas duplicados
+        9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
+        10. Manter só a última linha de cada restaurante (lotes novos atualizam o restaurante)
+
+        Todas as etapas são vetorizadas (sem apply linha a linha) e o dataframe de
+        entrada não é alterado. As etapas 1 a 7 ficam em clean_columns; as etapas 8 a 10
+        dependem das outras linhas do arquivo (o modo em pedaços, fome_zero.chunked, as
+        refaz entre os pedaços). Cópias exatas têm o mesmo restaurant_id, então o resultado
+        é a última linha de cada restaurante com valor não zerado, a mesma que a ingestão
+        incremental (fome_zero.ingest) mantém lote a lote.
+
+        Input: Dataframe
+        Output: Dataframe
+    """
+    df_new = clean_columns( df )
+
+    # 8. Excluir linhas duplicados (fica a última cópia: um lote que devolve o restaurante à
+    # linha original precisa valer sobre a atualização anterior, como na ingestão incremental)
+    df_new = df_new.drop_duplicates( keep='last' )
+
+    # 9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
+    df_new = df_new.loc[df_new.average_cost_for_two!=0,:]
+
+    # 10. Manter só a última linha de cada restaurante
+    df_new = df_new.loc[~df_new['restaurant_id'].duplicated( keep='last' ).to_numpy(), :]
+
+    return df_new
+
+# -----------------------------------------------------------------------------------------------
+def clean_columns( df ):
+    """ Etapas 1 a 7 de clean_code: só olham para a própria linha, então valem igualmente
+        para o arquivo inteiro ou para um pedaço dele
+
+        Input: Dataframe
+        Output: Dataframe com COLUMNS, sem linhas com dados ausentes
+    """
+    # 4. Renomear as colunas do DataFrame
+    df = df.rename( columns=rename_columns( tuple( df.columns ) ), copy=False )
+
+    # 1. Preenchimento do nome dos países
+    country_name = map_codes( df['country_code'], COUNTRIES )
+
+    # 2. Criação do Tipo de Categoria de Comida
+    price_range = df['price_range'].to_numpy()
+    price_type = np.where( np.isin( price_range, [1, 2, 3] ), price_range, 0 ).astype( np.intp )
+    price_range_name = pd.Series( PRICE_TYPES[price_type], index=df.index )
+
+    # 3. Criação do nome das Cores
+    color_name = map_codes( df['rating_color'], COLORS )
+
+    # 5. Categorizar por tipo de culinária (split feito só sobre os valores distintos); a lista
+    #    completa, normalizada como "A, B", alimenta o modelo multi-culinária (fome_zero.cuisines)
+    codes, uniques = pd.factorize( df['cuisines'].fillna( "" ) )
+    first_cuisine = uniques.str.split( ",", n=1 ).str[0].to_numpy( dtype=object )
+    cuisines = pd.Series( first_cuisine[codes], index=df.index )
+    cuisine_lists = np.array( [", ".join( split_cuisines( value ) ) for value in uniques], dtype=object )
+    all_cuisines = pd.Series( cuisine_lists[codes], index=df.index )
+
+    # 6. Selecionar somente algumas colunas
+    derived = { 'country_name': country_name, 'price_range_name': price_range_name,
+                'color_name': color_name, 'cuisines': cuisines, 'all_cuisines': all_cuisines }
+    df_new = pd.DataFrame( { col: derived[col] if col in derived else df[col] for col in COLUMNS } )
+
+    # 7. Excluir linhas com dados ausentes
+    return df_new.dropna( axis=0 )
+
+
+# =======================================
+# Cache do dataset tratado
+# =======================================
+
+_datasets = {}
+_lock = threading.Lock()
+_derived_lock = threading.RLock()
+
+# Um único dataset tratado por arquivo, compartilhado por todas as sessões do processo
+class Dataset( namedtuple( 'Dataset', ['df', 'version', 'mtime_ns', 'size', 'cache'] ) ):
+    __slots__ = ()
+
+    def derived( self, name, builder ):
+        """ Estrutura derivada do dataframe (agregados, índices), construída uma vez por versão
+
+            Input: nome da estrutura, função builder( df )
+            Output: resultado do builder, em cache enquanto o dataset não mudar
+        """
+        try:
+            return self.cache[name]
+        except KeyError:
+            pass
+        with _derived_lock:
+            if name not in self.cache:
+                self.cache[name] = builder( self.df )
+            return self.cache[name]
+
+# -----------------------------------------------------------------------------------------------
+def file_hash( path ):
+    """ Calcula o hash (sha1) do conteúdo do arquivo em blocos, sem carregá-lo inteiro """
+    digest = hashlib.sha1()
+    with open( path, 'rb' ) as f:
+        for block in iter( lambda: f.read( 1 << 20 ), b'' ):
+            digest.update( block )
+    return digest.hexdigest()
+
+# -----------------------------------------------------------------------------------------------
+def read_dataset( path ):
+    """ Lê o dataset tratado, preferindo o snapshot colunar ao CSV
+
+        Se o snapshot estiver atualizado ele é lido via memory-map; caso contrário o CSV é
+        lido e limpo e o snapshot é regerado. Lido do snapshot, o dataframe aponta para as
+        páginas do arquivo (compartilhadas entre processos) e as colunas de texto são
+        string[pyarrow].
+
+        Input: caminho do CSV
+        Output: (Dataframe tratado, versão)
+    """
+    snap = snapshot.snapshot_path( path )
+    if snapshot.is_fresh( path, snap ):
+        with stage( 'read_snapshot' ):
+            result = snapshot.read_snapshot( snap )
+        if result is not None:
+            return result
+
+    version = file_hash( path )
+    with stage( 'read_csv' ):
+        df_raw = pd.read_csv( path )
+    with stage( 'clean' ):
+        df_new = apply_schema( clean_code( df_raw ) )
+    with stage( 'write_snapshot' ):
+        df_new = snapshot.publish_snapshot( df_new, snap, version )
+    return df_new, version
+
+# -----------------------------------------------------------------------------------------------
+def build_snapshot( path=DATA_PATH ):
+    """ Etapa de build: gera o snapshot colunar do CSV, se ele estiver desatualizado
+
+        Input: caminho do CSV
+        Output: caminho do snapshot
+    """
+    read_dataset( os.path.abspath( path ) )
+    return snapshot.snapshot_path( os.path.abspath( path ) )
+
+# -----------------------------------------------------------------------------------------------
+def get_dataset( path=DATA_PATH ):
+    """ Retorna o Dataset tratado do arquivo, lendo e limpando o CSV somente uma vez por processo
+
+        O cache é invalidado quando o mtime/tamanho do arquivo muda e o hash do conteúdo
+        também mudou; um "touch" no arquivo não força uma nova limpeza.
+
+        Input: caminho do CSV
+        Output: Dataset (df, version, mtime_ns, size, cache)
+    """
+    path = os.path.abspath( path )
+    stat = os.stat( path )
+
+    dataset = _datasets.get( path )
+    if dataset is not None and ( dataset.mtime_ns, dataset.size ) == ( stat.st_mtime_ns, stat.st_size ):
+        return dataset
+
+    with _lock:
+        dataset = _datasets.get( path )
+        if dataset is not None and ( dataset.mtime_ns, dataset.size ) == ( stat.st_mtime_ns, stat.st_size ):
+            return dataset
+
+        if dataset is not None and dataset.version == file_hash( path ):
+            dataset = dataset._replace( mtime_ns=stat.st_mtime_ns, size=stat.st_size )
+        else:
+            df_new, version = read_dataset( path )
+            # estado agregado gravado pela ingestão/rebuild da mesma versão, se houver
+            state = snapshot.read_state( snapshot.state_path( path ), version )
+            dataset = Dataset( df_new, version, stat.st_mtime_ns, stat.st_size, {} if state is None else { 'aggregate_state': state } )
+
+        _datasets[path] = dataset
+        return dataset
+
+# -----------------------------------------------------------------------------------------------
+def publish_dataset( path, dataset ):
+    """ Troca o Dataset em cache do arquivo (usado pela ingestão incremental)
+
+        A troca é uma única atribuição sob o lock: cada execução de página que já pegou o
+        Dataset anterior segue com ele, e as próximas recebem o novo por inteiro.
+
+        Input: caminho do CSV, Dataset
+    """
+    with _lock:
+        _datasets[os.path.abspath( path )] = dataset
+
+# -----------------------------------------------------------------------------------------------
+def load_dataset( path=DATA_PATH ):
+    """ Retorna uma visão (cópia rasa) do dataframe tratado em cache
+
+        As páginas recebem sempre o mesmo dado já limpo; reatribuir ou filtrar a visão
+        não altera o dataframe compartilhado. Não modifique os valores no lugar.
+
+        Input: caminho do CSV
+        Output: Dataframe
+    """
+    return get_dataset( path ).df.copy( deep=False )
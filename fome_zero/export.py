@@ -0,0 +1,136 @@
+# Libraries
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow o download fica só em CSV
+    pa = None
+
+from fome_zero.filters import select, selection_key
+
+
+# formato: (nome do arquivo, mime)
+EXPORT_FORMATS = {
+    'csv': ( 'data.csv', 'text/csv' ),
+    'csv.gz': ( 'data.csv.gz', 'application/gzip' ),
+    'parquet': ( 'data.parquet', 'application/vnd.apache.parquet' ),
+}
+
+# Linhas serializadas por vez no CSV (o arquivo inteiro nunca vira uma única string)
+CHUNK_ROWS = 50_000
+
+# Teto de memória dos arquivos de download mantidos em cache (compartilhado entre sessões)
+MAX_CACHED_EXPORT_BYTES = 64 * 1024 * 1024
+
+_export_cache = OrderedDict()
+_export_lock = threading.Lock()
+
+
+# =======================================
+# Funções
+# =======================================
+
+def available_formats():
+    """ Formatos de download disponíveis (Parquet exige pyarrow) """
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pa is not None]
+
+# -----------------------------------------------------------------------------------------------
+def iter_frames( view, chunk_rows=CHUNK_ROWS ):
+    """ Linhas da visão em dataframes de até chunk_rows linhas (pelo menos um, mesmo vazio);
+        só um pedaço fica materializado por vez
+
+        Input: RowView, linhas por pedaço
+        Output: gerador de Dataframes
+    """
+    for start in range( 0, max( view.n_rows, 1 ), chunk_rows ):
+        yield view.frame( start=start, stop=start + chunk_rows )
+
+# -----------------------------------------------------------------------------------------------
+def iter_csv_chunks( view, chunk_rows=CHUNK_ROWS ):
+    """ CSV da visão em pedaços de chunk_rows linhas (cabeçalho só no primeiro)
+
+        Input: RowView, linhas por pedaço
+        Output: gerador de bytes em UTF-8
+    """
+    for i, df in enumerate( iter_frames( view, chunk_rows ) ):
+        yield df.to_csv( header=( i == 0 ) ).encode( 'utf-8' )
+
+# -----------------------------------------------------------------------------------------------
+def write_export( view, fileobj, fmt ):
+    """ Grava as linhas da visão no arquivo (binário) no formato pedido, sem montar tudo em memória
+
+        Input: RowView (filters.select), arquivo aberto em modo binário, formato de EXPORT_FORMATS
+    """
+    if fmt == 'csv':
+        for chunk in iter_csv_chunks( view ):
+            fileobj.write( chunk )
+    elif fmt == 'csv.gz':
+        # mtime fixo: o mesmo dado gera sempre os mesmos bytes
+        with gzip.GzipFile( fileobj=fileobj, mode='wb', mtime=0 ) as gz:
+            for chunk in iter_csv_chunks( view ):
+                gz.write( chunk )
+    elif fmt == 'parquet':
+        if pa is None:
+            raise ValueError( 'Formato parquet exige pyarrow' )
+        # um row group por pedaço
+        writer = None
+        for df in iter_frames( view ):
+            table = pa.Table.from_pandas( df, preserve_index=True )
+            if writer is None:
+                writer = pq.ParquetWriter( fileobj, table.schema )
+            writer.write_table( table )
+        writer.close()
+    else:
+        raise ValueError( f'Formato desconhecido: {fmt}' )
+
+# -----------------------------------------------------------------------------------------------
+def export_key( dataset, paises, fmt ):
+    """ Chave do arquivo de download: versão do dataset, seleção de países e formato """
+    return ( dataset.version, selection_key( paises ), fmt )
+
+# -----------------------------------------------------------------------------------------------
+def cached_export( dataset, paises, fmt ):
+    """ Arquivo de download já gerado para a seleção, ou None """
+    key = export_key( dataset, paises, fmt )
+    with _export_lock:
+        if key in _export_cache:
+            _export_cache.move_to_end( key )
+            return _export_cache[key]
+    return None
+
+# -----------------------------------------------------------------------------------------------
+def export_bytes( dataset, paises, fmt ):
+    """ Arquivo de download dos países selecionados, gerado sob demanda e mantido em cache
+
+        Input: Dataset, lista de países, formato de EXPORT_FORMATS
+        Output: bytes do arquivo
+    """
+    data = cached_export( dataset, paises, fmt )
+    if data is not None:
+        return data
+
+    buffer = io.BytesIO()
+    write_export( select( dataset, paises ), buffer, fmt )
+    data = buffer.getvalue()
+
+    with _export_lock:
+        _export_cache[export_key( dataset, paises, fmt )] = data
+        total = sum( len( value ) for value in _export_cache.values() )
+        while total > MAX_CACHED_EXPORT_BYTES and len( _export_cache ) > 1:
+            total -= len( _export_cache.popitem( last=False )[1] )
+    return data
+
+
+if __name__ == '__main__':
+    # Exporta o dataset tratado: python -m fome_zero.export saida.csv.gz [país ...]
+    import sys
+    from fome_zero.data import get_dataset
+
+    path, paises = sys.argv[1], sys.argv[2:]
+    fmt = next( fmt for fmt in sorted( EXPORT_FORMATS, key=len, reverse=True ) if path.endswith( '.' + fmt ) )
+    with open( path, 'wb' ) as f:
+        write_export( select( get_dataset(), paises or None ), f, fmt )
@@ -0,0 +1,96 @@
+# Libraries
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.utils
+import streamlit as st
+
+from fome_zero.timing import stage
+
+try:
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+except ImportError:  # sem o proto o gráfico vai por st.plotly_chart
+    PlotlyChartProto = None
+
+
+# Teto de memória dos gráficos serializados mantidos em cache (compartilhado entre sessões)
+MAX_CACHED_FIGURE_BYTES = 16 * 1024 * 1024
+
+# Mesma configuração que st.plotly_chart envia por padrão
+CHART_CONFIG = json.dumps( { 'showLink': False, 'linkText': False } )
+
+# Versões (major, minor) do Streamlit em que o envio direto do proto foi conferido contra
+# st.plotly_chart (a do requirements.txt); nas demais o gráfico vai pela API pública
+PROTO_VERSIONS = { ( 1, 25 ) }
+
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+# =======================================
+# Funções
+# =======================================
+
+def figure_key( builder, version, filter_key ):
+    """ Chave do gráfico: a função que o desenha (arquivo + nome, estável entre reruns da
+        página), a versão do dataset de onde vêm os agregados e o filtro aplicado """
+    return ( builder.__code__.co_filename, builder.__qualname__, version, filter_key )
+
+# -----------------------------------------------------------------------------------------------
+def figure_spec( builder, version, filter_key, *args ):
+    """ JSON do gráfico builder( *args ), em cache por gráfico, versão do dataset e filtro
+
+        Só na primeira vez de cada chave a figura é montada (px.bar, update_layout...) e
+        serializada; nas seguintes o texto pronto é devolvido. Todo argumento que muda o
+        gráfico precisa estar em filter_key.
+
+        Input: função que devolve a figura, versão do dataset, chave do filtro, argumentos
+        Output: JSON da figura (str)
+    """
+    key = figure_key( builder, version, filter_key )
+    with stage( 'figure' ):
+        with _figure_lock:
+            if key in _figure_cache:
+                _figure_cache.move_to_end( key )
+                return _figure_cache[key]
+
+        spec = json.dumps( builder( *args ), cls=plotly.utils.PlotlyJSONEncoder )
+
+    with _figure_lock:
+        _figure_cache[key] = spec
+        total = sum( len( value ) for value in _figure_cache.values() )
+        while total > MAX_CACHED_FIGURE_BYTES and len( _figure_cache ) > 1:
+            total -= len( _figure_cache.popitem( last=False )[1] )
+    return spec
+
+# -----------------------------------------------------------------------------------------------
+def proto_supported():
+    """ True se o Streamlit instalado é de uma versão em que o envio direto do proto foi conferido """
+    try:
+        version = tuple( int( part ) for part in st.__version__.split( '.' )[:2] )
+    except ValueError:
+        return False
+    return PlotlyChartProto is not None and version in PROTO_VERSIONS and hasattr( st, '_main' )
+
+# -----------------------------------------------------------------------------------------------
+def plotly_chart( spec, use_container_width=True, theme='streamlit' ):
+    """ Envia o JSON pronto no mesmo formato de st.plotly_chart, sem reconstruir a figura
+        (st.plotly_chart revalida e reserializa o gráfico a cada rerun)
+
+        O atalho usa o proto interno do Streamlit e só vale nas versões de PROTO_VERSIONS; nas
+        outras o JSON volta a dicionário e vai por st.plotly_chart, a API pública.
+
+        Input: JSON da figura (figure_spec), largura do container, tema
+    """
+    with stage( 'render' ):
+        if not proto_supported():
+            return st.plotly_chart( json.loads( spec ), use_container_width=use_container_width, theme=theme )
+
+        proto = PlotlyChartProto()
+        proto.use_container_width = use_container_width
+        proto.figure.spec = spec
+        proto.figure.config = CHART_CONFIG
+        proto.theme = theme or ''
+        # _main respeita o container ativo (with col1: ...), como st.plotly_chart
+        return st._main._enqueue( 'plotly_chart', proto )
@@ -0,0 +1,90 @@
+# Libraries
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from fome_zero.aggregates import dataset_aggregate, diverse_countries
+from fome_zero.bitmaps import bitmap_index, query_bitmap, to_rows
+from fome_zero.views import RowView
+
+
+# Teto de memória dos arrays de linhas mantidos em cache (compartilhado entre sessões)
+MAX_CACHED_ROWS_BYTES = 32 * 1024 * 1024
+
+# Seleção normalizada da barra lateral; None = sem filtro naquele campo
+Selection = namedtuple( 'Selection', ['countries', 'cuisines', 'min_cuisines'] )
+
+_rows_cache = OrderedDict()
+_rows_lock = threading.Lock()
+
+
+# =======================================
+# Funções
+# =======================================
+
+def selection_key( paises=None, cuisines=None, qtde_rest=None ):
+    """ Normaliza a seleção da barra lateral: listas viram tuplas ordenadas e sem repetição,
+        então a mesma seleção feita em qualquer ordem (ou em outra página) cai na mesma chave
+
+        Input: lista de países, lista de culinárias, mínimo de culinárias distintas por país
+        Output: Selection
+    """
+    def normalize( values ):
+        return None if values is None else tuple( sorted( set( map( str, values ) ) ) )
+
+    min_cuisines = int( qtde_rest ) if qtde_rest else None
+    return Selection( normalize( paises ), normalize( cuisines ), min_cuisines )
+
+# -----------------------------------------------------------------------------------------------
+def selection_rows( dataset, selection ):
+    """ Posições das linhas que atendem à seleção, pelo índice de bitmaps (sem isin nem cópia do frame)
+
+        A diversidade de culinárias vem da contagem por país pré-calculada (cuisine_catalog),
+        sobre todas as linhas do país, como no antigo filtro groupby/filter da página Cozinhas.
+
+        Input: Dataset, Selection
+        Output: array de posições
+    """
+    index = dataset.derived( 'bitmap_index', bitmap_index )
+    countries = selection.countries
+
+    if selection.min_cuisines is not None:
+        catalog = dataset_aggregate( dataset, 'cuisine_catalog' )
+        countries = diverse_countries( catalog, countries, selection.min_cuisines )
+
+    return to_rows( index, query_bitmap( index, country_name=countries, cuisines=selection.cuisines ) )
+
+# -----------------------------------------------------------------------------------------------
+def selected_rows( dataset, paises=None, cuisines=None, qtde_rest=None ):
+    """ Posições (iloc) das linhas da seleção, em cache por versão do dataset e seleção
+
+        Input: Dataset, lista de países, lista de culinárias, mínimo de culinárias por país
+        Output: array de posições (somente leitura)
+    """
+    key = ( dataset.version, selection_key( paises, cuisines, qtde_rest ) )
+    with _rows_lock:
+        if key in _rows_cache:
+            _rows_cache.move_to_end( key )
+            return _rows_cache[key]
+
+    rows = selection_rows( dataset, key[1] )
+    rows = rows.astype( np.int32 if len( dataset.df ) < 2 ** 31 else np.int64 )
+    rows.setflags( write=False )
+
+    with _rows_lock:
+        _rows_cache[key] = rows
+        total = sum( value.nbytes for value in _rows_cache.values() )
+        while total > MAX_CACHED_ROWS_BYTES and len( _rows_cache ) > 1:
+            total -= _rows_cache.popitem( last=False )[1].nbytes
+    return rows
+
+# -----------------------------------------------------------------------------------------------
+def select( dataset, paises=None, cuisines=None, qtde_rest=None ):
+    """ Linhas da seleção como visão sobre o frame compartilhado (nenhuma coluna é copiada; a
+        sessão guarda só o array de posições em cache)
+
+        Input: Dataset, lista de países, lista de culinárias, mínimo de culinárias por país
+        Output: RowView (use .frame( colunas ) no ponto de agregação)
+    """
+    return RowView( dataset.df, selected_rows( dataset, paises, cuisines, qtde_rest ) )
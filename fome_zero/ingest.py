@@ -0,0 +1,152 @@
+# Libraries
+import io
+import os
+import shutil
+import threading
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from fome_zero import snapshot
+from fome_zero.aggregates import aggregate_state, merge_states
+from fome_zero.data import DATA_PATH, Dataset, clean_code, file_hash, get_dataset, publish_dataset
+from fome_zero.schema import apply_schema
+
+
+# Uma ingestão por vez (cada lote parte da versão publicada pelo anterior)
+_ingest_lock = threading.Lock()
+
+
+# =======================================
+# Funções
+# =======================================
+
+def read_batch( batch_path, path=DATA_PATH ):
+    """ Lê um lote no formato do zomato.csv, conferindo o cabeçalho
+
+        Input: caminho do lote, caminho do CSV principal
+        Output: (Dataframe bruto, bytes das linhas de dados do lote)
+    """
+    with open( path, 'rb' ) as f:
+        header = f.readline().rstrip( b'\r\n' )
+    with open( batch_path, 'rb' ) as f:
+        content = f.read()
+
+    batch_header, _, body = content.partition( b'\n' )
+    if batch_header.rstrip( b'\r' ) != header:
+        raise ValueError( f'Cabeçalho do lote difere do CSV principal: {batch_path}' )
+    return pd.read_csv( io.BytesIO( content ) ), body
+
+# -----------------------------------------------------------------------------------------------
+def concat_rows( df, new_rows ):
+    """ Junta linhas tratadas mantendo as colunas de categoria como categoria
+
+        As categorias são unidas (códigos remapeados), sem reconverter o texto das linhas antigas.
+
+        Input: Dataframe tratado, Dataframe tratado com as linhas novas
+        Output: Dataframe
+    """
+    columns = {}
+    for col in df.columns:
+        if isinstance( df[col].dtype, pd.CategoricalDtype ):
+            values = union_categoricals( [df[col], new_rows[col].astype( 'category' )], sort_categories=True, ignore_order=True )
+            columns[col] = pd.Series( values, index=df.index.append( new_rows.index ) )
+        else:
+            columns[col] = pd.concat( [df[col], new_rows[col].astype( df[col].dtype )] )
+    return pd.DataFrame( columns )
+
+# -----------------------------------------------------------------------------------------------
+def csv_rows( path ):
+    """ Quantidade de linhas de dados do CSV (contadas pelo parser: campos entre aspas podem
+        ter quebra de linha) """
+    return len( pd.read_csv( path, usecols=[0] ) )
+
+# -----------------------------------------------------------------------------------------------
+def upsert( df, new_rows, offset ):
+    """ Substitui pelo restaurant_id as linhas que o lote atualiza e acrescenta as novas no fim
+
+        As linhas do lote recebem no índice a linha do CSV em que ficam depois do acréscimo
+        (offset + posição no lote), o mesmo índice que clean_code daria ao CSV inteiro.
+
+        Input: Dataframe tratado, Dataframe tratado do lote, linhas de dados do CSV antes do lote
+        Output: (Dataframe resultante, linhas removidas)
+    """
+    replaced = df['restaurant_id'].isin( new_rows['restaurant_id'] ).to_numpy()
+    new_rows = new_rows.set_axis( new_rows.index + offset )
+    return concat_rows( df.loc[~replaced, :], new_rows ), df.loc[replaced, :]
+
+# -----------------------------------------------------------------------------------------------
+def append_batch( path, body, tmp_path ):
+    """ Grava em tmp_path uma cópia do CSV principal com as linhas do lote acrescentadas
+        (a troca pelo arquivo principal fica com quem chama, ver ingest_batch) """
+    shutil.copyfile( path, tmp_path )
+    with open( tmp_path, 'rb+' ) as f:
+        f.seek( 0, os.SEEK_END )
+        if f.tell() > 0:
+            f.seek( -1, os.SEEK_END )
+            if f.read( 1 ) != b'\n':
+                f.write( b'\r\n' )
+        f.write( body )
+
+# -----------------------------------------------------------------------------------------------
+def ingest_batch( batch_path, path=DATA_PATH ):
+    """ Ingestão incremental de um lote (novos restaurantes e atualizações)
+
+        Só as linhas do lote passam pela limpeza (clean_code + schema). Elas substituem pelo
+        restaurant_id as linhas do dataset em cache e o estado agregado (países, cidades,
+        culinárias) é atualizado somando o lote e subtraindo as linhas substituídas.
+
+        O snapshot e o estado agregado da nova versão são gravados antes da troca do CSV, e o
+        CSV novo recebe o mtime do snapshot: os outros processos (workers do Streamlit, API)
+        passam direto da versão anterior para a nova, lendo o snapshot e o estado gravados em
+        vez de limpar o CSV de novo. Os índices derivados (bitmaps, top K, mapa) são refeitos sob
+        demanda na nova versão.
+
+        Input: caminho do lote, caminho do CSV principal
+        Output: Dataset publicado
+    """
+    path = os.path.abspath( path )
+    with _ingest_lock:
+        dataset = get_dataset( path )
+        raw, body = read_batch( batch_path, path )
+        new_rows = apply_schema( clean_code( raw ) )
+
+        offset = dataset.cache.get( 'csv_rows' )
+        offset = csv_rows( path ) if offset is None else offset
+        df, removed = upsert( dataset.df, new_rows, offset )
+        state = dataset.derived( 'aggregate_state', aggregate_state )
+        state = merge_states( state, aggregate_state( removed ), sign=-1 )
+        state = merge_states( state, aggregate_state( new_rows ) )
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            append_batch( path, body, tmp_path )
+            version = file_hash( tmp_path )
+
+            snap = snapshot.snapshot_path( path )
+            snapshot.write_state( state, snapshot.state_path( path ), version )
+            if snapshot.write_snapshot( df, snap, version ):
+                # mesmo mtime do snapshot: is_fresh vale para o CSV novo desde a troca
+                mtime_ns = os.stat( snap ).st_mtime_ns
+                os.utime( tmp_path, ns=( mtime_ns, mtime_ns ) )
+                result = snapshot.read_snapshot( snap )
+                if result is not None and result[1] == version:
+                    df = result[0]
+
+            os.replace( tmp_path, path )
+        finally:
+            if os.path.exists( tmp_path ):
+                os.remove( tmp_path )
+
+        stat = os.stat( path )
+        dataset = Dataset( df, version, stat.st_mtime_ns, stat.st_size, { 'aggregate_state': state, 'csv_rows': offset + len( raw ) } )
+        publish_dataset( path, dataset )
+        return dataset
+
+if __name__ == '__main__':
+    # Ingestão de lotes: python -m fome_zero.ingest lote1.csv [lote2.csv ...]
+    import sys
+
+    for batch in sys.argv[1:]:
+        dataset = ingest_batch( batch )
+        print( f'{batch}: {len( dataset.df )} linhas, versão {dataset.version}' )
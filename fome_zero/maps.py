@@ -0,0 +1,106 @@
+# Libraries
+import threading
+from collections import OrderedDict
+
+import folium
+import numpy as np
+from folium.plugins import FastMarkerCluster
+
+
+POINT_COLUMNS = ['latitude', 'longitude', 'color_name', 'restaurant_name',
+                 'average_cost_for_two', 'currency', 'cuisines', 'aggregate_rating']
+
+# Quantidade de mapas renderizados (um por seleção de países) mantidos em cache
+MAX_CACHED_MAPS = 32
+
+# O marcador e o popup são montados no navegador; o popup só é gerado ao clicar
+MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker( new L.LatLng( row[0], row[1] ), {
+        icon: L.AwesomeMarkers.icon( { icon: 'home', markerColor: row[2], prefix: 'glyphicon' } )
+    } );
+    marker.bindTooltip( 'clique aqui' );
+    marker.bindPopup( function () {
+        var div = document.createElement( 'div' );
+        div.style.width = '250px';
+        var name = document.createElement( 'b' );
+        name.textContent = row[3];
+        div.appendChild( name );
+        var rating = String( row[7] );
+        var lines = [ '', '',
+                      'Preço para dois: ' + row[4].toFixed( 2 ) + ' ( ' + row[5] + ')',
+                      'Type: ' + row[6],
+                      'Nota: ' + ( rating.indexOf( '.' ) < 0 ? rating + '.0' : rating ) + '/5.0' ];
+        for ( var i = 0; i < lines.length; i++ ) {
+            if ( i > 0 ) { div.appendChild( document.createElement( 'br' ) ); }
+            div.appendChild( document.createTextNode( lines[i] ) );
+        }
+        return div;
+    } );
+    return marker;
+}
+"""
+
+_html_cache = OrderedDict()
+_html_lock = threading.Lock()
+
+
+# =======================================
+# Funções
+# =======================================
+
+def map_points( df ):
+    """ Um ponto por restaurante, com a mediana da localização, preço e nota
+
+        Input: Dataframe tratado
+        Output: Dataframe com country_name e as colunas de POINT_COLUMNS
+    """
+    df_aux = ( df.loc[:, ['country_name', 'city', 'aggregate_rating', 'currency', 'cuisines', 'color_name', 'restaurant_id',
+                          'latitude', 'longitude', 'average_cost_for_two', 'restaurant_name']]
+                 .groupby( ['country_name', 'city', 'cuisines', 'color_name', 'currency', 'restaurant_id', 'restaurant_name'], observed=True )
+                 .median().reset_index() )
+
+    # float64 com poucas casas: o payload do mapa não carrega ruído de float32
+    df_aux['latitude'] = df_aux['latitude'].astype( 'float64' ).round( 6 )
+    df_aux['longitude'] = df_aux['longitude'].astype( 'float64' ).round( 6 )
+    df_aux['aggregate_rating'] = df_aux['aggregate_rating'].astype( 'float64' ).round( 2 )
+    df_aux['average_cost_for_two'] = df_aux['average_cost_for_two'].astype( 'float64' )
+    return df_aux.loc[:, ['country_name'] + POINT_COLUMNS]
+
+# -----------------------------------------------------------------------------------------------
+def restaurant_map( points ):
+    """ Mapa folium com os restaurantes agrupados em cluster no navegador
+
+        Os dados dos marcadores vão coluna a coluna para uma única lista JSON; marcadores,
+        ícones e popups são criados em JavaScript.
+
+        Input: Dataframe de pontos (map_points)
+        Output: folium.Map
+    """
+    map1 = folium.Map()
+    data = points.loc[:, POINT_COLUMNS].astype( { 'color_name': str, 'currency': str, 'cuisines': str } ).to_numpy().tolist()
+    FastMarkerCluster( data, callback=MARKER_CALLBACK, chunkedLoading=True ).add_to( map1 )
+    return map1
+
+# -----------------------------------------------------------------------------------------------
+def map_html( dataset, paises ):
+    """ HTML do mapa dos países selecionados, em cache por versão do dataset e seleção
+
+        Input: Dataset, lista de países
+        Output: HTML do mapa (para components.html)
+    """
+    key = ( dataset.version, tuple( sorted( paises ) ) )
+    with _html_lock:
+        if key in _html_cache:
+            _html_cache.move_to_end( key )
+            return _html_cache[key]
+
+    points = dataset.derived( 'map_points', map_points )
+    points = points.loc[np.asarray( points['country_name'].isin( paises ) ), :]
+    html = folium.Figure().add_child( restaurant_map( points ) ).render()
+
+    with _html_lock:
+        _html_cache[key] = html
+        while len( _html_cache ) > MAX_CACHED_MAPS:
+            _html_cache.popitem( last=False )
+    return html
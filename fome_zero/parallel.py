@@ -0,0 +1,132 @@
+# Libraries
+import functools
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fome_zero import snapshot
+from fome_zero.aggregates import STATE_AGGREGATES, aggregate_state, dataset_aggregate, merge_states
+from fome_zero.data import DATA_PATH, Dataset, clean_code, file_hash, publish_dataset
+from fome_zero.schema import apply_schema
+
+
+# Processos do pool por padrão (um por núcleo)
+WORKERS = os.cpu_count() or 1
+
+
+# =======================================
+# Funções
+# =======================================
+
+def partition_rows( raw, n_parts ):
+    """ Divide as linhas do CSV bruto em n_parts partições de tamanho parecido, por Country Code
+
+        Um país maior que a fatia de uma partição (a Índia tem quase metade das linhas) é
+        dividido pelo hash do Restaurant ID. Linhas repetidas e atualizações de um restaurante
+        têm o mesmo Restaurant ID e país, então ficam sempre na mesma partição e as etapas
+        8 e 10 de clean_code dão, em cada partição, o mesmo resultado que no arquivo inteiro.
+
+        Input: Dataframe bruto, quantidade de partições
+        Output: lista de arrays de posições, em ordem crescente dentro de cada partição
+    """
+    countries = pd.factorize( raw['Country Code'], use_na_sentinel=False )[0]
+    ids_hash = pd.util.hash_pandas_object( raw['Restaurant ID'], index=False ).to_numpy()
+    target = max( -( -len( raw ) // n_parts ), 1 )
+
+    # grupos: países inteiros ou pedaços de país pelo hash do restaurante
+    groups = []
+    order = np.argsort( countries, kind='stable' )
+    bounds = np.r_[0, np.cumsum( np.bincount( countries ) )]
+    for start, end in zip( bounds[:-1], bounds[1:] ):
+        rows = order[start:end]
+        pieces = -( -len( rows ) // target )
+        if pieces <= 1:
+            groups.append( rows )
+        else:
+            bucket = ids_hash[rows] % np.uint64( pieces )
+            groups.extend( rows[bucket == piece] for piece in range( pieces ) )
+
+    # maior grupo primeiro, sempre na partição com menos linhas
+    loads = [( 0, part ) for part in range( n_parts )]
+    parts = [[] for _ in range( n_parts )]
+    for rows in sorted( groups, key=len, reverse=True ):
+        load, part = heapq.heappop( loads )
+        parts[part].append( rows )
+        heapq.heappush( loads, ( load + len( rows ), part ) )
+
+    return [np.sort( np.concatenate( rows ) ) for rows in parts if rows]
+
+# -----------------------------------------------------------------------------------------------
+def clean_partition( raw ):
+    """ Limpeza e estado agregado de uma partição (executado em um processo do pool)
+
+        Input: Dataframe bruto da partição
+        Output: (Dataframe tratado sem schema, AggregateState)
+    """
+    df_new = clean_code( raw )
+    return df_new, aggregate_state( apply_schema( df_new ) )
+
+# -----------------------------------------------------------------------------------------------
+def parallel_clean( raw, workers=None ):
+    """ Limpeza e estado agregado do CSV bruto em um pool de processos
+
+        Cada partição (partition_rows) é limpa e agregada em um processo; os dataframes
+        voltam para a ordem original das linhas e o schema é aplicado uma vez no resultado,
+        então as categorias saem iguais às do caminho serial. Os estados parciais são somados
+        com merge_states. Com workers=1 tudo roda no próprio processo, sem pool.
+
+        Input: Dataframe bruto, quantidade de processos (padrão: WORKERS)
+        Output: (Dataframe tratado, AggregateState), iguais a apply_schema( clean_code( raw ) )
+                e aggregate_state do resultado
+    """
+    workers = WORKERS if workers is None else max( int( workers ), 1 )
+    parts = [raw.iloc[rows] for rows in partition_rows( raw, workers )]
+
+    if len( parts ) <= 1:
+        results = [clean_partition( raw )]
+    else:
+        with ProcessPoolExecutor( max_workers=len( parts ) ) as pool:
+            results = list( pool.map( clean_partition, parts ) )
+
+    df_new = apply_schema( pd.concat( [df_part for df_part, _ in results] ).sort_index() )
+    state = functools.reduce( merge_states, [state for _, state in results] )
+    return df_new, state
+
+# -----------------------------------------------------------------------------------------------
+def rebuild_dataset( path=DATA_PATH, workers=None ):
+    """ Reconstrução completa em paralelo: limpeza, snapshot, estado agregado e os agregados das
+        páginas (STATE_AGGREGATES); o Dataset resultante é publicado no cache do processo
+
+        O estado agregado é gravado ao lado do snapshot (snapshot.write_state): os workers do
+        Streamlit e a API carregam os dois em get_dataset, sem limpar o CSV nem refazer o estado.
+
+        Input: caminho do CSV, quantidade de processos
+        Output: Dataset publicado
+    """
+    path = os.path.abspath( path )
+    stat = os.stat( path )
+    version = file_hash( path )
+
+    df_new, state = parallel_clean( pd.read_csv( path ), workers )
+    snapshot.write_state( state, snapshot.state_path( path ), version )
+    df_new = snapshot.publish_snapshot( df_new, snapshot.snapshot_path( path ), version )
+
+    dataset = Dataset( df_new, version, stat.st_mtime_ns, stat.st_size, { 'aggregate_state': state } )
+    for name in STATE_AGGREGATES:
+        dataset_aggregate( dataset, name )
+    publish_dataset( path, dataset )
+    return dataset
+
+
+if __name__ == '__main__':
+    # Reconstrução em paralelo: python -m fome_zero.parallel [caminho do csv] [processos]
+    import sys
+    import time
+
+    start = time.perf_counter()
+    dataset = rebuild_dataset( sys.argv[1] if len( sys.argv ) > 1 else DATA_PATH,
+                               int( sys.argv[2] ) if len( sys.argv ) > 2 else None )
+    print( f'{len( dataset.df )} linhas, versão {dataset.version}, {time.perf_counter() - start:.2f} s' )
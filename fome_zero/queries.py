@@ -0,0 +1,110 @@
+# Libraries
+from fome_zero.aggregates import (cuisine_top_index, dataset_aggregate, diverse_countries, home_metrics, select_countries,
+                                  top_cities, top_restaurants_merge)
+from fome_zero.cuisines import cuisine_membership
+from fome_zero.filters import select
+
+
+# Métricas dos gráficos da página Países (médias = soma / quantidade da tabela agregada)
+COUNTRY_METRICS = ['restaurants', 'cities', 'votes', 'average_cost_for_two']
+
+# Métricas dos gráficos da página Cidades (ver aggregates.top_cities)
+CITY_METRICS = ['restaurants', 'rating_above', 'rating_below', 'cuisines']
+
+
+# =======================================
+# Funções sobre os agregados
+# =======================================
+
+def country_ranking( cube, metric ):
+    """ Países em ordem decrescente de uma métrica da tabela agregada
+
+        Input: tabela agregada por país (country_cube), métrica de COUNTRY_METRICS
+        Output: Dataframe com country_name e a métrica
+    """
+    if metric == 'votes':
+        values = cube.votes_sum / cube.votes_count
+    elif metric == 'average_cost_for_two':
+        values = cube.cost_sum / cube.cost_count
+    else:
+        values = cube[metric]
+    return values.rename( metric ).to_frame().sort_values( by=metric, ascending=False ).reset_index()
+
+# -----------------------------------------------------------------------------------------------
+def cuisine_ranking( ratings, n, ascending=False ):
+    """ As n culinárias de maior (ou menor, ascending=True) nota média, com duas casas
+
+        Input: notas médias por culinária (cuisine_ratings), n, ordem
+        Output: Dataframe com cuisines e aggregate_rating
+    """
+    df_aux = ratings.sort_values( 'aggregate_rating', ascending=ascending ).head( n ).reset_index( drop=True )
+    return round( df_aux.astype( { 'aggregate_rating': 'float64' } ), 2 )
+
+
+# =======================================
+# Consultas sobre o Dataset (mesmos números das páginas, sem Streamlit)
+# =======================================
+
+def all_countries( dataset ):
+    """ Países presentes no dataset """
+    return list( dataset_aggregate( dataset, 'country_cube' ).index )
+
+# -----------------------------------------------------------------------------------------------
+def countries( dataset, paises=None, metric='restaurants' ):
+    """ Ranking de países por métrica (gráficos da página Países)
+
+        Input: Dataset, lista de países (None = todos), métrica de COUNTRY_METRICS
+        Output: Dataframe com country_name e a métrica
+    """
+    if metric not in COUNTRY_METRICS:
+        raise ValueError( f'Métrica de país desconhecida: {metric}' )
+    cube = dataset_aggregate( dataset, 'country_cube' )
+    return country_ranking( cube if paises is None else select_countries( cube, paises ), metric )
+
+# -----------------------------------------------------------------------------------------------
+def cities( dataset, paises=None, metric='restaurants', n=10, threshold=None ):
+    """ Top n cidades por métrica (gráficos da página Cidades)
+
+        Input: Dataset, lista de países (None = todos), métrica de CITY_METRICS, n, limite de nota
+        Output: Dataframe com city, country_name e a métrica
+    """
+    if metric not in CITY_METRICS:
+        raise ValueError( f'Métrica de cidade desconhecida: {metric}' )
+    if metric in ( 'rating_above', 'rating_below' ) and threshold is None:
+        threshold = 4 if metric == 'rating_above' else 2
+    paises = all_countries( dataset ) if paises is None else paises
+    return top_cities( dataset_aggregate( dataset, 'city_index' ), paises, metric, n, threshold=threshold )
+
+# -----------------------------------------------------------------------------------------------
+def cuisines( dataset, n=10, ascending=False ):
+    """ Melhores (ou piores) culinárias pela nota média (gráficos da página Cozinhas)
+
+        Input: Dataset, n, ordem
+        Output: Dataframe com cuisines e aggregate_rating
+    """
+    return cuisine_ranking( dataset_aggregate( dataset, 'cuisine_ratings' ), n, ascending )
+
+# -----------------------------------------------------------------------------------------------
+def restaurants( dataset, paises=None, cuisine_names=None, n=10, min_cuisines=None ):
+    """ Top n restaurantes dos países e culinárias (tabela da página Cozinhas)
+
+        Input: Dataset, lista de países (None = todos), lista de culinárias (None = todas), n,
+               mínimo de culinárias distintas por país
+        Output: Dataframe com as colunas de TOP_COLUMNS, em ordem decrescente de nota
+    """
+    catalog = dataset_aggregate( dataset, 'cuisine_catalog' )
+    if min_cuisines is not None:
+        paises = diverse_countries( catalog, paises, min_cuisines )
+    paises = all_countries( dataset ) if paises is None else paises
+    cuisine_names = catalog.options if cuisine_names is None else cuisine_names
+    return top_restaurants_merge( dataset.derived( 'cuisine_top_index', cuisine_top_index ), paises, cuisine_names, n )
+
+# -----------------------------------------------------------------------------------------------
+def home( dataset, paises=None ):
+    """ Métricas do Home (restaurantes, países, cidades, avaliações e culinárias)
+
+        Input: Dataset, lista de países (None = todos)
+        Output: dicionário de home_metrics
+    """
+    view = select( dataset, all_countries( dataset ) if paises is None else paises )
+    return home_metrics( view, dataset.derived( 'cuisine_membership', cuisine_membership ) )
@@ -0,0 +1,75 @@
+# Libraries
+import pandas as pd
+
+
+# Colunas de texto com poucos valores distintos, guardadas como categorias
+CATEGORY_COLUMNS = ['country_name', 'city', 'cuisines', 'currency', 'color_name', 'price_range_name',
+                    'rating_text', 'locality', 'locality_verbose', 'all_cuisines']
+
+# Colunas 0/1
+FLAG_COLUMNS = ['has_table_booking', 'has_online_delivery', 'is_delivering_now']
+
+# Colunas numéricas com faixa de valores pequena
+NUMERIC_DTYPES = {
+    'restaurant_id': 'int32',
+    'longitude': 'float32',
+    'latitude': 'float32',
+    'average_cost_for_two': 'int32',
+    'aggregate_rating': 'float32',
+    'votes': 'uint32',
+}
+
+# restaurant_name e address ficam como texto: quase todos os valores são distintos
+# (lidos do snapshot, viram string[pyarrow] sobre o arquivo mapeado; ver snapshot.shared_frame)
+
+
+# =======================================
+# Funções
+# =======================================
+
+def dtype_plan( df ):
+    """ Tipos de dado do dataframe tratado, restritos às colunas presentes
+
+        Input: Dataframe tratado
+        Output: dicionário {coluna: dtype}
+    """
+    plan = {}
+    plan.update( { col: 'category' for col in CATEGORY_COLUMNS } )
+    plan.update( { col: 'int8' for col in FLAG_COLUMNS } )
+    plan.update( NUMERIC_DTYPES )
+    return { col: dtype for col, dtype in plan.items() if col in df.columns }
+
+# -----------------------------------------------------------------------------------------------
+def apply_schema( df ):
+    """ Converte o dataframe tratado para os tipos de dado compactos
+
+        Input: Dataframe tratado
+        Output: Dataframe
+    """
+    return df.astype( dtype_plan( df ) )
+
+# -----------------------------------------------------------------------------------------------
+def memory_report( before, after ):
+    """ Compara o uso de memória (memory_usage(deep=True)) por coluna antes e depois do schema
+
+        Input: Dataframe original, Dataframe convertido
+        Output: Dataframe com dtype e bytes antes/depois por coluna, mais a linha 'total'
+    """
+    report = pd.DataFrame( {
+        'dtype_antes': before.dtypes.astype( str ),
+        'dtype_depois': after.dtypes.astype( str ),
+        'bytes_antes': before.memory_usage( deep=True, index=False ),
+        'bytes_depois': after.memory_usage( deep=True, index=False ),
+    } )
+    report.loc['total'] = ['', '', report['bytes_antes'].sum(), report['bytes_depois'].sum()]
+    report['reducao'] = ( 1 - report['bytes_depois'] / report['bytes_antes'] ).round( 3 )
+    return report
+
+
+if __name__ == '__main__':
+    # Relatório de memória: python -m fome_zero.schema [caminho do csv]
+    import sys
+    from fome_zero.data import DATA_PATH, clean_code
+
+    df_new = clean_code( pd.read_csv( sys.argv[1] if len( sys.argv ) > 1 else DATA_PATH ) )
+    print( memory_report( df_new, apply_schema( df_new ) ).to_string() )
@@ -0,0 +1,218 @@
+# Libraries
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from fome_zero.cuisines import cuisine_membership
+
+
+# HyperLogLog: 2 ** HLL_PRECISION registradores por sketch; erro padrão relativo 1.04 / sqrt(m)
+HLL_PRECISION = 14
+
+# DDSketch: erro relativo máximo dos quantis; valores fora de [MIN, MAX] caem nas pontas
+DD_ALPHA = 0.01
+DD_MIN_VALUE = 1e-3
+DD_MAX_VALUE = 1e12
+
+# Margem de erro mostrada para as estimativas do HyperLogLog (2 erros padrão, ~95%)
+ERROR_Z = 2
+
+_GAMMA = ( 1 + DD_ALPHA ) / ( 1 - DD_ALPHA )
+_LOG_GAMMA = math.log( _GAMMA )
+_MIN_KEY = math.ceil( math.log( DD_MIN_VALUE ) / _LOG_GAMMA )
+_MAX_KEY = math.ceil( math.log( DD_MAX_VALUE ) / _LOG_GAMMA )
+
+# 2 ** i, para o tamanho em bits de um uint64 via searchsorted (sem passar por float)
+_POWERS = np.left_shift( np.uint64( 1 ), np.arange( 64, dtype=np.uint64 ) )
+
+# Sketch de quantis (DDSketch): zeros conta os valores <= DD_MIN_VALUE; counts[i] conta os
+# valores da faixa (gamma ** (k - 1), gamma ** k] com k = i + _MIN_KEY
+QuantileSketch = namedtuple( 'QuantileSketch', ['zeros', 'counts'] )
+
+# Sketches de um país: registradores HLL de restaurantes (nomes), cidades e culinárias, soma
+# exata dos votos (sem repetir restaurante/votos, como no Home) e quantis de nota e preço
+CountrySketches = namedtuple( 'CountrySketches', ['currency', 'restaurants', 'cities', 'cuisines',
+                                                  'votes', 'rating', 'cost'] )
+
+
+# =======================================
+# HyperLogLog
+# =======================================
+
+def value_hashes( values ):
+    """ Hash de 64 bits de cada valor (pelo texto), estável entre processos """
+    return pd.util.hash_array( np.asarray( values, dtype=object ).astype( str ).astype( object ) )
+
+# -----------------------------------------------------------------------------------------------
+def hll_registers( hashes, precision=HLL_PRECISION ):
+    """ Registradores HyperLogLog dos hashes: os primeiros bits escolhem o registrador, que guarda
+        a maior posição do primeiro bit 1 no restante do hash
+
+        Input: array uint64 de hashes, precisão
+        Output: array uint8 com 2 ** precisão registradores
+    """
+    hashes = np.asarray( hashes, dtype=np.uint64 )
+    width = 64 - precision
+    index = ( hashes >> np.uint64( width ) ).astype( np.intp )
+    rest = hashes & np.uint64( ( 1 << width ) - 1 )
+    rank = ( width + 1 - np.searchsorted( _POWERS, rest, side='right' ) ).astype( np.uint8 )
+
+    registers = np.zeros( 1 << precision, dtype=np.uint8 )
+    np.maximum.at( registers, index, rank )
+    return registers
+
+# -----------------------------------------------------------------------------------------------
+def hll_estimate( registers ):
+    """ Cardinalidade estimada (com a correção de contagem linear para poucos valores) """
+    m = len( registers )
+    alpha = 0.7213 / ( 1 + 1.079 / m )
+    estimate = alpha * m * m / np.sum( np.ldexp( 1.0, -registers.astype( np.int64 ) ) )
+    zeros = int( np.count_nonzero( registers == 0 ) )
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * math.log( m / zeros )
+    return int( round( estimate ) )
+
+# -----------------------------------------------------------------------------------------------
+def hll_error( estimate, precision=HLL_PRECISION ):
+    """ Margem de erro (ERROR_Z erros padrão) de uma estimativa do HyperLogLog """
+    return int( math.ceil( ERROR_Z * 1.04 / math.sqrt( 1 << precision ) * estimate ) )
+
+
+# =======================================
+# DDSketch
+# =======================================
+
+def quantile_sketch( values ):
+    """ DDSketch dos valores (não negativos); o quantil estimado tem erro relativo <= DD_ALPHA
+
+        Input: array de valores
+        Output: QuantileSketch
+    """
+    values = np.asarray( values, dtype='float64' )
+    positive = values[values > DD_MIN_VALUE]
+    keys = np.clip( np.ceil( np.log( positive ) / _LOG_GAMMA ), _MIN_KEY, _MAX_KEY ).astype( np.intp ) - _MIN_KEY
+    counts = np.bincount( keys, minlength=_MAX_KEY - _MIN_KEY + 1 ).astype( np.int64 )
+    return QuantileSketch( len( values ) - len( positive ), counts )
+
+# -----------------------------------------------------------------------------------------------
+def sketch_quantile( sketch, q ):
+    """ Quantil q (0..1) do sketch; None se o sketch estiver vazio """
+    total = sketch.zeros + int( sketch.counts.sum() )
+    if total == 0:
+        return None
+    rank = q * ( total - 1 )
+    if rank < sketch.zeros:
+        return 0.0
+    key = int( np.searchsorted( np.cumsum( sketch.counts ), rank - sketch.zeros, side='right' ) ) + _MIN_KEY
+    return 2 * _GAMMA ** key / ( _GAMMA + 1 )
+
+
+# =======================================
+# Sketches por país
+# =======================================
+
+def country_sketches( df ):
+    """ Sketches de cada país, calculados uma vez a partir do dataframe tratado
+
+        Qualquer seleção de países é respondida somando os sketches dos países (merge_sketches),
+        sem voltar às linhas.
+
+        Input: Dataframe tratado
+        Output: dicionário {país: CountrySketches}
+    """
+    membership = cuisine_membership( df )
+    country_codes = df['country_name'].cat.codes.to_numpy()
+    name_hashes = value_hashes( df['restaurant_name'].to_numpy() )
+    city_hashes = value_hashes( df['city'].cat.categories )[df['city'].cat.codes.to_numpy()]
+    cuisine_hashes = value_hashes( membership.names )[membership.indices]
+    cuisine_codes = country_codes[membership.rows]
+
+    sketches = {}
+    for code, country in enumerate( df['country_name'].cat.categories ):
+        rows = np.flatnonzero( country_codes == code )
+        if len( rows ) == 0:
+            continue
+        votes = pd.DataFrame( { 'restaurant_name': df['restaurant_name'].array.take( rows ),
+                                'votes': df['votes'].to_numpy()[rows] } ).drop_duplicates()
+        sketches[country] = CountrySketches(
+            currency=str( df['currency'].iloc[rows[0]] ),
+            restaurants=hll_registers( name_hashes[rows] ),
+            cities=hll_registers( city_hashes[rows] ),
+            cuisines=hll_registers( cuisine_hashes[cuisine_codes == code] ),
+            votes=int( votes['votes'].sum() ),
+            rating=quantile_sketch( df['aggregate_rating'].to_numpy()[rows] ),
+            cost=quantile_sketch( df['average_cost_for_two'].to_numpy()[rows] ),
+        )
+    return sketches
+
+# -----------------------------------------------------------------------------------------------
+def merge_sketches( sketches ):
+    """ Sketch da união: máximo dos registradores HLL, soma dos votos e dos contadores de quantis
+
+        Input: lista de CountrySketches (não vazia)
+        Output: CountrySketches (currency só quando todos usam a mesma moeda)
+    """
+    currencies = { sketch.currency for sketch in sketches }
+    return CountrySketches(
+        currency=currencies.pop() if len( currencies ) == 1 else None,
+        restaurants=np.maximum.reduce( [sketch.restaurants for sketch in sketches] ),
+        cities=np.maximum.reduce( [sketch.cities for sketch in sketches] ),
+        cuisines=np.maximum.reduce( [sketch.cuisines for sketch in sketches] ),
+        votes=sum( sketch.votes for sketch in sketches ),
+        rating=QuantileSketch( sum( sketch.rating.zeros for sketch in sketches ),
+                               np.sum( [sketch.rating.counts for sketch in sketches], axis=0 ) ),
+        cost=QuantileSketch( sum( sketch.cost.zeros for sketch in sketches ),
+                             np.sum( [sketch.cost.counts for sketch in sketches], axis=0 ) ),
+    )
+
+# -----------------------------------------------------------------------------------------------
+def approximate_metrics( sketches, paises ):
+    """ Métricas do Home estimadas pelos sketches dos países selecionados, com a margem de erro
+
+        Distintos de restaurantes, cidades e culinárias vêm do HyperLogLog (margem de ERROR_Z
+        erros padrão); países e votos são exatos (votos repetidos entre países somariam duas
+        vezes); mediana e p90 da nota têm erro relativo de até DD_ALPHA.
+
+        Input: {país: CountrySketches}, lista de países
+        Output: dicionário com as chaves de home_metrics, rating_median e rating_p90, e
+                'errors' com a margem de cada uma
+    """
+    selected = [sketches[pais] for pais in paises if pais in sketches]
+    if not selected:
+        metrics = dict.fromkeys( ['restaurants', 'countries', 'cities', 'votes', 'cuisines'], 0 )
+        metrics.update( rating_median=None, rating_p90=None, errors=dict.fromkeys( metrics, 0 ) )
+        return metrics
+
+    merged = merge_sketches( selected )
+    metrics = {
+        'restaurants': hll_estimate( merged.restaurants ),
+        'countries': len( selected ),
+        'cities': hll_estimate( merged.cities ),
+        'votes': merged.votes,
+        'cuisines': hll_estimate( merged.cuisines ),
+        'rating_median': sketch_quantile( merged.rating, 0.5 ),
+        'rating_p90': sketch_quantile( merged.rating, 0.9 ),
+    }
+    metrics['errors'] = {
+        'restaurants': hll_error( metrics['restaurants'] ),
+        'countries': 0,
+        'cities': hll_error( metrics['cities'] ),
+        'votes': 0,
+        'cuisines': hll_error( metrics['cuisines'] ),
+        'rating_median': DD_ALPHA * metrics['rating_median'],
+        'rating_p90': DD_ALPHA * metrics['rating_p90'],
+    }
+    return metrics
+
+# -----------------------------------------------------------------------------------------------
+def cost_quantiles( sketches, paises, quantiles=( 0.5, 0.9 ) ):
+    """ Quantis do preço para dois por país (cada país na sua moeda), pelos sketches
+
+        Input: {país: CountrySketches}, lista de países, quantis
+        Output: Dataframe com country_name, currency e uma coluna por quantil (p50, p90, ...)
+    """
+    rows = [[pais, sketches[pais].currency] + [sketch_quantile( sketches[pais].cost, q ) for q in quantiles]
+            for pais in sorted( paises ) if pais in sketches]
+    return pd.DataFrame( rows, columns=['country_name', 'currency'] + [f'p{round( q * 100 )}' for q in quantiles] )
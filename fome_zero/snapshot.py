@@ -0,0 +1,215 @@
+# Libraries
+import os
+import pickle
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # sem pyarrow o app segue lendo direto do CSV
+    pa = None
+
+
+# Muda sempre que clean_code/schema mudarem a forma do dado gravado
+# (5: um único record batch, para as colunas serem lidas sem cópia; 6: a etapa 8 de
+# clean_code mantém a última cópia das linhas duplicadas)
+SNAPSHOT_FORMAT = b'6'
+
+_FORMAT_KEY = b'fome_zero.format'
+_VERSION_KEY = b'fome_zero.version'
+
+
+# =======================================
+# Funções
+# =======================================
+
+def snapshot_path( csv_path ):
+    """ Caminho do snapshot colunar (Feather/Arrow IPC) ao lado do CSV """
+    return os.path.splitext( csv_path )[0] + '.feather'
+
+# -----------------------------------------------------------------------------------------------
+def state_path( csv_path ):
+    """ Caminho do estado agregado (AggregateState) gravado ao lado do snapshot """
+    return os.path.splitext( csv_path )[0] + '.state.pkl'
+
+# -----------------------------------------------------------------------------------------------
+def is_fresh( csv_path, path ):
+    """ True se o snapshot existe e não é mais antigo que o CSV de origem """
+    if pa is None or not os.path.exists( path ):
+        return False
+    return os.stat( path ).st_mtime_ns >= os.stat( csv_path ).st_mtime_ns
+
+# -----------------------------------------------------------------------------------------------
+def snapshot_metadata( schema, version ):
+    """ Metadados do schema Arrow acrescidos do formato e da versão (hash do CSV) do snapshot """
+    metadata = dict( schema.metadata or {} )
+    metadata.update( { _FORMAT_KEY: SNAPSHOT_FORMAT, _VERSION_KEY: version.encode() } )
+    return metadata
+
+# -----------------------------------------------------------------------------------------------
+def write_snapshot( df, path, version ):
+    """ Grava o dataframe tratado em Feather sem compressão e num único record batch, para que
+        cada coluna seja um buffer contíguo do arquivo (ver shared_frame)
+
+        A escrita vai para um arquivo temporário e é trocada de forma atômica, então
+        um leitor nunca enxerga um snapshot pela metade.
+
+        Input: Dataframe tratado, caminho do snapshot, versão (hash do CSV)
+        Output: True se o snapshot foi gravado
+    """
+    if pa is None:
+        return False
+
+    table = pa.Table.from_pandas( df, preserve_index=True )
+    table = table.replace_schema_metadata( snapshot_metadata( table.schema, version ) )
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        feather.write_feather( table, tmp_path, compression='uncompressed', chunksize=max( table.num_rows, 1 ) )
+        os.replace( tmp_path, path )
+    except OSError:
+        if os.path.exists( tmp_path ):
+            os.remove( tmp_path )
+        return False
+    return True
+
+# -----------------------------------------------------------------------------------------------
+def shared_column( array ):
+    """ Coluna do pandas sobre os buffers do array Arrow, sem cópia
+
+        Números e flags viram arrays numpy somente leitura, categorias usam os índices do
+        dicionário como códigos (só as categorias, poucas, são copiadas) e texto vira
+        string[pyarrow]. Devolve None para o que não dá para ler sem cópia (nulos, booleanos).
+
+        Input: pyarrow.Array
+        Output: array numpy, Categorical, ArrowStringArray ou None
+    """
+    if array.null_count:
+        return None
+    if pa.types.is_dictionary( array.type ):
+        # os códigos foram gravados com a largura que o pandas escolheria (int8/int16/int32)
+        dtype = pd.CategoricalDtype( array.dictionary.to_pandas(), ordered=array.type.ordered )
+        return pd.Categorical.from_codes( array.indices.to_numpy( zero_copy_only=True ), dtype=dtype )
+    if pa.types.is_string( array.type ):
+        return pd.arrays.ArrowStringArray( pa.chunked_array( [array] ) )
+    try:
+        return array.to_numpy( zero_copy_only=True )
+    except pa.ArrowInvalid:
+        return None
+
+# -----------------------------------------------------------------------------------------------
+def shared_frame( table ):
+    """ Dataframe que aponta para os buffers da tabela lida via memory-map, sem copiar as linhas
+
+        As páginas do arquivo ficam no page cache do sistema, compartilhadas por todos os
+        processos (workers do Streamlit, API) que lerem o mesmo snapshot: a memória privada de
+        cada processo fica com os objetos Python das categorias, não com as linhas. Os arrays são
+        somente leitura. O frame não pode ser consolidado (loc/iloc com várias colunas, to_numpy
+        do frame inteiro...): o pandas juntaria os blocos no lugar, copiando as colunas para
+        memória privada e gravável. Quem lê várias colunas passa por views.RowView, coluna a
+        coluna. Só as colunas são compartilhadas: os índices derivados (bitmaps, índice
+        espacial, pertinência de culinárias, pirâmide do mapa) continuam sendo montados em cada
+        processo, na primeira vez que uma página os pede.
+
+        Input: pyarrow.Table de um único record batch
+        Output: Dataframe ou None se alguma coluna precisar de cópia (quem chama usa to_pandas)
+    """
+    metadata = table.schema.pandas_metadata or {}
+    index_columns = metadata.get( 'index_columns', [] )
+    if any( column.num_chunks != 1 for column in table.columns ) or not all( isinstance( name, str ) for name in index_columns ):
+        return None
+
+    columns = {}
+    for name, column in zip( table.column_names, table.columns ):
+        values = shared_column( column.chunk( 0 ) )
+        if values is None:
+            return None
+        columns[name] = values
+
+    if index_columns:
+        names = { entry['field_name']: entry['name'] for entry in metadata.get( 'columns', [] ) }
+        index = pd.Index( columns.pop( index_columns[0] ), name=names.get( index_columns[0] ), copy=False )
+    else:
+        index = None
+    return pd.DataFrame( columns, index=index, copy=False )
+
+# -----------------------------------------------------------------------------------------------
+def read_snapshot( path ):
+    """ Lê o snapshot via memory-map, sem copiar as colunas (shared_frame) quando possível
+
+        Input: caminho do snapshot
+        Output: (Dataframe, versão) ou None se o snapshot for inválido ou de outro formato
+    """
+    if pa is None:
+        return None
+
+    try:
+        table = feather.read_table( path, memory_map=True )
+    except ( OSError, pa.ArrowInvalid ):
+        return None
+
+    metadata = table.schema.metadata or {}
+    if metadata.get( _FORMAT_KEY ) != SNAPSHOT_FORMAT or _VERSION_KEY not in metadata:
+        return None
+
+    df = shared_frame( table )
+    return ( table.to_pandas() if df is None else df ), metadata[_VERSION_KEY].decode()
+
+# -----------------------------------------------------------------------------------------------
+def publish_snapshot( df, path, version ):
+    """ Grava o snapshot e devolve o dataframe relido dele, apontando para as páginas do arquivo
+        que os outros processos também mapeiam (a cópia em memória do processo pode ser liberada)
+
+        Input: Dataframe tratado, caminho do snapshot, versão (hash do CSV)
+        Output: Dataframe do snapshot, ou o próprio df se o snapshot não pôde ser gravado ou lido
+                ou se outro processo trocou o arquivo por outra versão nesse meio tempo
+    """
+    if write_snapshot( df, path, version ):
+        result = read_snapshot( path )
+        if result is not None and result[1] == version:
+            return result[0]
+    return df
+
+# -----------------------------------------------------------------------------------------------
+def write_state( state, path, version ):
+    """ Grava o estado agregado da versão do CSV (ingestão e rebuild), para que os outros
+        processos não precisem recalculá-lo a partir das linhas
+
+        Input: AggregateState, caminho do arquivo de estado, versão (hash do CSV)
+        Output: True se o estado foi gravado
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open( tmp_path, 'wb' ) as f:
+            pickle.dump( ( SNAPSHOT_FORMAT, version, state ), f, protocol=pickle.HIGHEST_PROTOCOL )
+        os.replace( tmp_path, path )
+    except OSError:
+        if os.path.exists( tmp_path ):
+            os.remove( tmp_path )
+        return False
+    return True
+
+# -----------------------------------------------------------------------------------------------
+def read_state( path, version ):
+    """ Lê o estado agregado gravado por write_state
+
+        Input: caminho do arquivo de estado, versão (hash do CSV) esperada
+        Output: AggregateState ou None se o arquivo não existe, é inválido ou de outra versão
+    """
+    try:
+        with open( path, 'rb' ) as f:
+            state_format, state_version, state = pickle.load( f )
+    except ( OSError, EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError ):
+        return None
+    if ( state_format, state_version ) != ( SNAPSHOT_FORMAT, version ):
+        return None
+    return state
+
+
+if __name__ == '__main__':
+    # Etapa de build: python -m fome_zero.snapshot [caminho do csv]
+    import sys
+    from fome_zero.data import DATA_PATH, build_snapshot
+
+    print( build_snapshot( sys.argv[1] if len( sys.argv ) > 1 else DATA_PATH ) )
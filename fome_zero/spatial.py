@@ -0,0 +1,143 @@
+# Libraries
+from collections import namedtuple
+
+import numpy as np
+from haversine import Unit, haversine_vector
+from scipy.spatial import cKDTree
+
+from fome_zero.bitmaps import bitmap_index, query_bitmap, to_mask
+from fome_zero.views import RowView
+
+
+# Raio médio da Terra usado pelo pacote haversine (Unit.KILOMETERS)
+EARTH_RADIUS_KM = 6371.0088
+
+NEAREST_COLUMNS = ['restaurant_id', 'restaurant_name', 'country_name', 'city', 'cuisines', 'all_cuisines',
+                   'price_range_name', 'average_cost_for_two', 'currency', 'aggregate_rating', 'latitude', 'longitude']
+
+# Com filtros muito seletivos a busca na árvore precisaria de candidatos demais; acima desta
+# fração do índice a distância é calculada direto sobre as linhas que passam nos filtros
+BRUTE_FORCE_FRACTION = 0.25
+
+# tree: KD-tree dos restaurantes na esfera unitária (x, y, z); rows: uma linha por
+# restaurant_id com NEAREST_COLUMNS; coords: array (n, 2) de (latitude, longitude) em float64;
+# bitmaps: índice de bitmaps de culinária (todas as do restaurante) e faixa de preço sobre rows
+SpatialIndex = namedtuple( 'SpatialIndex', ['tree', 'rows', 'coords', 'bitmaps'] )
+
+
+# =======================================
+# Funções
+# =======================================
+
+def unit_vectors( lat, lon ):
+    """ Coordenadas (x, y, z) na esfera unitária; a distância euclidiana entre elas (corda)
+        cresce junto com a distância de haversine, então o vizinho mais próximo é o mesmo """
+    lat = np.radians( np.asarray( lat, dtype='float64' ) )
+    lon = np.radians( np.asarray( lon, dtype='float64' ) )
+    cos_lat = np.cos( lat )
+    return np.stack( [cos_lat * np.cos( lon ), cos_lat * np.sin( lon ), np.sin( lat )], axis=-1 )
+
+# -----------------------------------------------------------------------------------------------
+def chord_length( radius_km ):
+    """ Corda na esfera unitária equivalente a uma distância de haversine em km """
+    return 2 * np.sin( min( radius_km / EARTH_RADIUS_KM, np.pi ) / 2 )
+
+# -----------------------------------------------------------------------------------------------
+def spatial_index( df ):
+    """ Índice espacial dos restaurantes, calculado uma vez a partir do dataframe tratado
+
+        Input: Dataframe tratado
+        Output: SpatialIndex
+    """
+    # pela visão, coluna a coluna: um loc com várias colunas consolidaria o frame compartilhado
+    rows = RowView( df, np.flatnonzero( ~df['restaurant_id'].duplicated().to_numpy() ) ).frame( NEAREST_COLUMNS ).reset_index( drop=True )
+    coords = rows.loc[:, ['latitude', 'longitude']].to_numpy( dtype='float64' )
+    return SpatialIndex( cKDTree( unit_vectors( coords[:, 0], coords[:, 1] ) ), rows, coords,
+                         bitmap_index( rows, ['cuisines', 'price_range_name'] ) )
+
+# -----------------------------------------------------------------------------------------------
+def filter_mask( index, cuisines=None, price_ranges=None ):
+    """ Máscara das linhas do índice que passam nos filtros (None quando não há filtro)
+
+        Input: SpatialIndex, lista de culinárias, lista de faixas de preço (vazias = todas)
+        Output: array booleano ou None
+    """
+    if not cuisines and not price_ranges:
+        return None
+    return to_mask( index.bitmaps, query_bitmap( index.bitmaps, cuisines=cuisines or None,
+                                                 price_range_name=price_ranges or None ) )
+
+# -----------------------------------------------------------------------------------------------
+def _distances( index, lat, lon, rows ):
+    # haversine vetorizado entre o ponto e as linhas candidatas
+    if len( rows ) == 0:
+        return np.array( [], dtype='float64' )
+    point = np.broadcast_to( np.array( [lat, lon], dtype='float64' ), ( len( rows ), 2 ) )
+    return haversine_vector( point, index.coords[rows], Unit.KILOMETERS )
+
+# -----------------------------------------------------------------------------------------------
+def _result( index, rows, distances ):
+    order = np.argsort( distances, kind='stable' )
+    df_aux = index.rows.iloc[rows[order]].reset_index( drop=True )
+    df_aux['distance_km'] = distances[order]
+    return df_aux
+
+# -----------------------------------------------------------------------------------------------
+def nearest( index, lat, lon, k, cuisines=None, price_ranges=None ):
+    """ Os k restaurantes mais próximos do ponto, opcionalmente filtrados
+
+        Sem filtro é uma consulta direta na KD-tree. Com filtro a consulta é ampliada até
+        juntar k candidatos que passam nos filtros; se isso exigir uma fração grande do índice,
+        as distâncias são calculadas só sobre as linhas filtradas (argpartition).
+
+        Input: SpatialIndex, latitude, longitude, k, culinárias, faixas de preço
+        Output: Dataframe com NEAREST_COLUMNS e distance_km, do mais próximo ao mais distante
+    """
+    mask = filter_mask( index, cuisines, price_ranges )
+    total = len( index.rows )
+    available = total if mask is None else int( mask.sum() )
+    k = min( int( k ), available )
+    if k <= 0:
+        return _result( index, np.array( [], dtype=np.intp ), _distances( index, lat, lon, [] ) )
+
+    point = unit_vectors( lat, lon )
+    if mask is None:
+        _, rows = index.tree.query( point, k=k )
+        rows = np.atleast_1d( rows )
+
+    elif k * total / available > BRUTE_FORCE_FRACTION * total:
+        candidates = np.flatnonzero( mask )
+        distances = _distances( index, lat, lon, candidates )
+        rows = candidates[np.argpartition( distances, k - 1 )[:k]] if k < len( candidates ) else candidates
+
+    else:
+        query_k = k
+        while True:
+            # pede o esperado pela seletividade do filtro, com folga, e amplia se faltar
+            query_k = min( max( 2 * query_k, int( 2 * k * total / available ) ), total )
+            _, candidates = index.tree.query( point, k=query_k )
+            candidates = np.atleast_1d( candidates )
+            candidates = candidates[mask[candidates]]
+            if len( candidates ) >= k or query_k == total:
+                break
+        rows = candidates[:k]
+
+    return _result( index, rows, _distances( index, lat, lon, rows ) )
+
+# -----------------------------------------------------------------------------------------------
+def within_radius( index, lat, lon, radius_km, cuisines=None, price_ranges=None ):
+    """ Restaurantes a até radius_km do ponto, opcionalmente filtrados
+
+        Input: SpatialIndex, latitude, longitude, raio em km, culinárias, faixas de preço
+        Output: Dataframe com NEAREST_COLUMNS e distance_km, do mais próximo ao mais distante
+    """
+    # a corda tem uma folga para erro de arredondamento; o corte exato é feito pelo haversine
+    rows = np.asarray( index.tree.query_ball_point( unit_vectors( lat, lon ), chord_length( radius_km ) * ( 1 + 1e-9 ) ),
+                       dtype=np.intp )
+    mask = filter_mask( index, cuisines, price_ranges )
+    if mask is not None:
+        rows = rows[mask[rows]]
+
+    distances = _distances( index, lat, lon, rows )
+    inside = distances <= radius_km
+    return _result( index, rows[inside], distances[inside] )
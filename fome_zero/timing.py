@@ -0,0 +1,164 @@
+# Libraries
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# Amostras guardadas por (página, etapa); as mais antigas saem primeiro
+MAX_SAMPLES = 2000
+
+# Modos de captura detalhada (None = só os tempos)
+CAPTURE_MODES = ['cprofile', 'tracemalloc']
+
+# Funções listadas por captura do cProfile (ordenadas pelo tempo acumulado)
+PROFILE_LINES = 25
+
+# Tempos de todas as sessões do processo: {(página, etapa): deque de segundos}
+_samples = {}
+# Última captura de cada (página, etapa): {(página, etapa): {'profile': texto} ou {'peak_kb': n, 'approximate': bool}}
+_captures = {}
+_timing_lock = threading.Lock()
+_capture_mode = None
+
+# Cada sessão do Streamlit roda o script da página na sua própria thread; depth conta as
+# etapas abertas na thread (só a mais externa é capturada)
+_current = threading.local()
+
+# Etapas medidas pelo tracemalloc em andamento no processo e quantas vezes duas se sobrepuseram
+# (o pico do tracemalloc é global: com sobreposição ele inclui alocações da outra sessão)
+_traced = { 'active': 0, 'overlaps': 0 }
+
+
+# =======================================
+# Funções
+# =======================================
+
+def start_page( name ):
+    """ Marca a página que está rodando nesta thread; as etapas seguintes são registradas nela """
+    _current.page = name
+
+# -----------------------------------------------------------------------------------------------
+def set_capture( mode ):
+    """ Liga (mode de CAPTURE_MODES) ou desliga (None) a captura detalhada das etapas """
+    global _capture_mode
+    if mode is not None and mode not in CAPTURE_MODES:
+        raise ValueError( f'Modo de captura desconhecido: {mode}' )
+    if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif mode != 'tracemalloc' and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _capture_mode = mode
+
+# -----------------------------------------------------------------------------------------------
+def capture_mode():
+    """ Modo de captura ativo (None = só os tempos) """
+    return _capture_mode
+
+# -----------------------------------------------------------------------------------------------
+def _profile_text( profiler ):
+    buffer = io.StringIO()
+    pstats.Stats( profiler, stream=buffer ).sort_stats( 'cumulative' ).print_stats( PROFILE_LINES )
+    return buffer.getvalue()
+
+# -----------------------------------------------------------------------------------------------
+@contextlib.contextmanager
+def stage( name ):
+    """ Mede o tempo do bloco como a etapa name da página atual (start_page)
+
+        Com a captura ligada, a etapa mais externa da thread também roda sob cProfile ou tem
+        o pico de memória medido pelo tracemalloc; as etapas internas entram na captura dela.
+        O pico é marcado como aproximado quando outra sessão mediu uma etapa ao mesmo tempo.
+
+        Input: nome da etapa (load, clean, filter, aggregate, figure, render...)
+    """
+    key = ( getattr( _current, 'page', '-' ), name )
+    depth = getattr( _current, 'depth', 0 )
+    mode = _capture_mode if depth == 0 else None
+    profiler = None
+    traced = False
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # outra sessão já está sendo perfilada
+            profiler = None
+    elif mode == 'tracemalloc' and tracemalloc.is_tracing():
+        traced = True
+        with _timing_lock:
+            _traced['active'] += 1
+            overlapped = _traced['active'] > 1
+            if overlapped:
+                _traced['overlaps'] += 1
+            else:
+                tracemalloc.reset_peak()
+            overlaps_start = _traced['overlaps']
+        memory_start = tracemalloc.get_traced_memory()[0]
+
+    _current.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _current.depth = depth
+        capture = None
+        if profiler is not None:
+            profiler.disable()
+            capture = { 'profile': _profile_text( profiler ) }
+        elif traced:
+            peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else memory_start
+            with _timing_lock:
+                overlapped = overlapped or _traced['overlaps'] != overlaps_start
+                _traced['active'] -= 1
+            capture = { 'peak_kb': round( ( peak - memory_start ) / 1024, 1 ), 'approximate': overlapped }
+
+        with _timing_lock:
+            if key not in _samples:
+                _samples[key] = deque( maxlen=MAX_SAMPLES )
+            _samples[key].append( elapsed )
+            if capture is not None:
+                _captures[key] = capture
+
+# -----------------------------------------------------------------------------------------------
+def stage_summary():
+    """ Percentis dos tempos por página e etapa, em milissegundos
+
+        Output: Dataframe com page, stage, count, p50_ms, p95_ms, p99_ms, mean_ms e total_ms
+    """
+    with _timing_lock:
+        samples = { key: np.array( values ) * 1e3 for key, values in _samples.items() }
+
+    rows = [[page, name, len( values ), *np.percentile( values, [50, 95, 99] ), values.mean(), values.sum()]
+            for ( page, name ), values in sorted( samples.items() )]
+    return pd.DataFrame( rows, columns=['page', 'stage', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'total_ms'] )
+
+# -----------------------------------------------------------------------------------------------
+def stage_captures():
+    """ Última captura (cProfile ou tracemalloc) de cada página e etapa """
+    with _timing_lock:
+        return dict( _captures )
+
+# -----------------------------------------------------------------------------------------------
+def export_json():
+    """ Tempos por etapa e capturas em JSON (download do painel de administração) """
+    return json.dumps( {
+        'capture_mode': _capture_mode,
+        'stages': stage_summary().round( 3 ).to_dict( orient='records' ),
+        'captures': [{ 'page': page, 'stage': name, **capture } for ( page, name ), capture in sorted( stage_captures().items() )],
+    }, indent=2 )
+
+# -----------------------------------------------------------------------------------------------
+def reset():
+    """ Descarta todas as amostras e capturas """
+    with _timing_lock:
+        _samples.clear()
+        _captures.clear()
@@ -0,0 +1,54 @@
+# Libraries
+import numpy as np
+import pandas as pd
+
+
+# =======================================
+# Visão filtrada (linhas sem cópia)
+# =======================================
+
+# Linhas selecionadas de um dataframe sem copiá-lo: o frame tratado (compartilhado entre as
+# sessões) e as posições (iloc) das linhas, ou None para todas. As colunas só são lidas, e só
+# nas linhas da visão, quando um agregado pede. Classe simples, não namedtuple: == e hash de
+# uma tupla com um dataframe dentro não funcionam, então a visão vale por identidade.
+class RowView:
+    __slots__ = ( 'df', 'rows' )
+
+    def __init__( self, df, rows=None ):
+        self.df = df
+        self.rows = rows
+
+    @property
+    def n_rows( self ):
+        """ Quantidade de linhas da visão """
+        return len( self.df ) if self.rows is None else len( self.rows )
+
+    def column( self, name, start=0, stop=None ):
+        """ Valores da coluna só nas linhas da visão (ou no trecho start:stop delas): array numpy
+            para colunas numpy e array do pandas (Categorical, string[pyarrow]) para as demais """
+        series = self.df[name]
+        values = series.to_numpy() if isinstance( series.dtype, np.dtype ) else series.array
+        if self.rows is None:
+            return values if ( start, stop ) == ( 0, None ) else values[start:stop]
+        rows = self.rows[start:stop]
+        return values[rows] if isinstance( values, np.ndarray ) else values.take( rows )
+
+    def codes( self, name ):
+        """ Códigos da coluna de categoria nas linhas da visão """
+        codes = self.df[name].cat.codes.to_numpy()
+        return codes if self.rows is None else codes[self.rows]
+
+    def frame( self, columns=None, start=0, stop=None ):
+        """ Dataframe só com as colunas pedidas das linhas da visão (ou do trecho start:stop
+            delas); é o único ponto em que as linhas são copiadas
+
+            O frame novo é montado coluna a coluna: um iloc com várias colunas sobre o frame
+            compartilhado faria o pandas consolidar os blocos dele no lugar, copiando as colunas
+            lidas do snapshot (memory-map, somente leitura) para memória privada do processo.
+
+            Input: lista de colunas (None = todas), início e fim do trecho
+            Output: Dataframe
+        """
+        columns = list( self.df.columns ) if columns is None else columns
+        index = self.df.index[slice( start, stop ) if self.rows is None else self.rows[start:stop]]
+        return pd.DataFrame( { col: self.column( col, start, stop ) for col in columns }, index=index, copy=False )
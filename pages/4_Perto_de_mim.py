@@ -0,0 +1,110 @@
+# Libraries
+import folium
+import streamlit as st
+from streamlit_folium import folium_static
+
+from fome_zero.data import get_dataset
+from fome_zero.spatial import nearest, spatial_index, within_radius
+from fome_zero.timing import stage, start_page
+
+st.set_page_config( page_title='Perto de mim', page_icon='📍', layout='wide' )
+start_page( 'Perto de mim' )
+
+# Limite de restaurantes desenhados no mapa (a tabela mostra todos)
+MAX_MAP_MARKERS = 200
+
+
+# =======================================
+# Funções
+# =======================================
+
+# -----------------------------------------------------------------------------------------------
+def nearby_table( df_near ):
+    # selecao de colunas
+    df_aux = df_near.loc[:, ['restaurant_name', 'distance_km', 'all_cuisines', 'price_range_name', 'aggregate_rating',
+                             'average_cost_for_two', 'currency', 'city', 'country_name']]
+    df_aux['distance_km'] = df_aux['distance_km'].round( 2 )
+    df_aux['aggregate_rating'] = df_aux['aggregate_rating'].astype( 'float64' ).round( 2 )
+    return df_aux.rename( columns={'restaurant_name': 'Restaurante', 'distance_km': 'Distância (km)', 'all_cuisines': 'Culinárias',
+                                   'price_range_name': 'Faixa de Preço', 'aggregate_rating': 'Nota',
+                                   'average_cost_for_two': 'Preço para dois', 'currency': 'Moeda', 'city': 'Cidade',
+                                   'country_name': 'País'} )
+
+# -----------------------------------------------------------------------------------------------
+def nearby_map( df_near, lat, lon, raio=None ):
+    # mapa centrado no ponto escolhido
+    map1 = folium.Map( location=[lat, lon], zoom_start=13 )
+    folium.Marker( [lat, lon], tooltip='Você está aqui', icon=folium.Icon( color='red', icon='user' ) ).add_to( map1 )
+    if raio is not None:
+        folium.Circle( [lat, lon], radius=raio * 1000, fill=False ).add_to( map1 )
+
+    for row in df_near.head( MAX_MAP_MARKERS ).itertuples( index=False ):
+        folium.Marker( [float( row.latitude ), float( row.longitude )],
+                       tooltip=f'{row.restaurant_name} ({row.distance_km:.2f} km)',
+                       icon=folium.Icon( color='green', icon='home' ) ).add_to( map1 )
+
+    if len( df_near ):
+        map1.fit_bounds( [[min( lat, float( df_near['latitude'].min() ) ), min( lon, float( df_near['longitude'].min() ) )],
+                          [max( lat, float( df_near['latitude'].max() ) ), max( lon, float( df_near['longitude'].max() ) )]] )
+    return map1
+
+
+
+# --------------------------- Inicio da Estrutura lógica do código --------------------------
+# ------------------------
+# Import dataset (índice espacial, calculado uma vez por versão do dataset)
+# ------------------------
+with stage( 'load' ):
+    dataset = get_dataset()
+with stage( 'aggregate' ):
+    spatial_idx = dataset.derived( 'spatial_index', spatial_index )
+
+# =======================================
+# Barra Lateral
+# =======================================
+
+st.sidebar.markdown('## Sua localização')
+
+lat = st.sidebar.number_input( 'Latitude', min_value=-90.0, max_value=90.0, value=-23.5634, format='%.4f' )
+lon = st.sidebar.number_input( 'Longitude', min_value=-180.0, max_value=180.0, value=-46.6669, format='%.4f' )
+
+st.sidebar.markdown('## Filtros')
+
+modo = st.sidebar.radio( 'Buscar', ['Mais próximos', 'Dentro de um raio'] )
+if modo == 'Mais próximos':
+    qtde_rest = st.sidebar.slider( 'Quantidade de Restaurantes', 1, 50, 10 )
+else:
+    raio = st.sidebar.slider( 'Raio (km)', 0.5, 50.0, 5.0, step=0.5 )
+
+cuisines = st.sidebar.multiselect(
+        'Tipos de Culinária (vazio = todos)',
+        sorted( spatial_idx.bitmaps.bitmaps['cuisines'] ) )
+
+price_ranges = st.sidebar.multiselect(
+        'Faixas de Preço (vazio = todas)',
+        ['cheap', 'normal', 'expensive', 'gourmet'] )
+
+# Busca no índice espacial
+with stage( 'filter' ):
+    if modo == 'Mais próximos':
+        df_near = nearest( spatial_idx, lat, lon, qtde_rest, cuisines, price_ranges )
+        raio = None
+    else:
+        df_near = within_radius( spatial_idx, lat, lon, raio, cuisines, price_ranges )
+
+# =======================================
+# Layout no Streamlit
+# =======================================
+
+st.markdown( '# 📍 Perto de mim' )
+
+with st.container():
+    col1, col2 = st.columns( 2 )
+    col1.metric( 'Restaurantes encontrados', len( df_near ) )
+    col2.metric( 'Mais próximo (km)', f"{df_near['distance_km'].iloc[0]:.2f}" if len( df_near ) else '-' )
+
+with st.container():
+    st.dataframe( nearby_table( df_near ), use_container_width=True )
+
+with st.container(), stage( 'render' ):
+    folium_static( nearby_map( df_near, lat, lon, raio ), width=1024, height=600 )
@@ -0,0 +1,33 @@
+# Libraries
+import pytest
+import streamlit as st
+
+from fome_zero import admin
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture
+def query( monkeypatch ):
+    """ Troca os parâmetros da URL vistos pelo painel """
+    params = {}
+    monkeypatch.setattr( st, 'experimental_get_query_params', lambda: params )
+    monkeypatch.delenv( admin.ADMIN_TOKEN_ENV, raising=False )
+    return params
+
+# -----------------------------------------------------------------------------------------------
+def test_admin_disabled_without_token( query, monkeypatch ):
+    monkeypatch.setattr( admin, 'admin_token', lambda: None )
+    query[admin.ADMIN_PARAM] = ['1']
+    assert not admin.admin_requested()
+
+# -----------------------------------------------------------------------------------------------
+def test_admin_requires_token( query, monkeypatch ):
+    monkeypatch.setenv( admin.ADMIN_TOKEN_ENV, 's3cr3t' )
+    assert not admin.admin_requested()
+    query[admin.ADMIN_PARAM] = ['1']
+    assert not admin.admin_requested()
+    query[admin.ADMIN_PARAM] = ['s3cr3t']
+    assert admin.admin_requested()
@@ -0,0 +1,102 @@
+# Libraries
+import asyncio
+import json
+import shutil
+from http import HTTPStatus
+
+import pytest
+
+from fome_zero import api, queries
+from fome_zero.api import handle_connection, handle_request
+from fome_zero.data import DATA_PATH, get_dataset
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture( scope='module' )
+def path( tmp_path_factory ):
+    """ Cópia do zomato.csv numa pasta temporária (snapshot e estado ficam fora do repositório) """
+    path = str( tmp_path_factory.mktemp( 'api' ) / 'zomato.csv' )
+    shutil.copyfile( DATA_PATH, path )
+    return path
+
+# -----------------------------------------------------------------------------------------------
+def test_ok_with_etag( path ):
+    status, headers, body = handle_request( 'GET', '/cuisines?n=3&order=worst', path=path )
+    assert status == HTTPStatus.OK
+    assert headers['ETag'].startswith( '"' ) and headers['ETag'].endswith( '"' )
+    expected = queries.cuisines( get_dataset( path ), n=3, ascending=True )
+    assert [row['cuisines'] for row in json.loads( body )] == list( expected['cuisines'] )
+
+# -----------------------------------------------------------------------------------------------
+def test_not_modified( path ):
+    _, headers, _ = handle_request( 'GET', '/countries?metric=votes', path=path )
+    status, headers_304, body = handle_request( 'GET', '/countries?metric=votes',
+                                                { 'if-none-match': f'"outro", {headers["ETag"]}' }, path=path )
+    assert status == HTTPStatus.NOT_MODIFIED
+    assert headers_304['ETag'] == headers['ETag'] and body == b''
+
+    status, _, _ = handle_request( 'GET', '/countries?metric=votes', { 'if-none-match': '"outro"' }, path=path )
+    assert status == HTTPStatus.OK
+
+# -----------------------------------------------------------------------------------------------
+def test_normalized_params( path ):
+    """ A mesma consulta em outra ordem (ou com repetição) tem o mesmo ETag e o mesmo corpo,
+        calculado com os argumentos normalizados """
+    first = handle_request( 'GET', '/restaurants?paises=India,Brazil&cuisines=Italian,Japanese&n=5', path=path )
+    second = handle_request( 'GET', '/restaurants?paises=Brazil&paises=India,Brazil&cuisines=Japanese,Italian&n=5', path=path )
+    assert first[1]['ETag'] == second[1]['ETag']
+    assert first[2] == second[2]
+
+    expected = queries.restaurants( get_dataset( path ), ['Brazil', 'India'], ['Italian', 'Japanese'], n=5 )
+    assert [row['restaurant_id'] for row in json.loads( first[2] )] == list( expected['restaurant_id'] )
+
+# -----------------------------------------------------------------------------------------------
+@pytest.mark.parametrize( 'target', ['/cities?n=dez', '/cities?metric=votes', '/cuisines?order=melhor', '/home?pais=Brazil',
+                                     '/cities?metric=rating_above&threshold=inf', '/cities?metric=rating_above&threshold=1e400',
+                                     '/cities?metric=rating_below&threshold=nan'] )
+def test_bad_request( path, target ):
+    status, _, body = handle_request( 'GET', target, path=path )
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'error' in json.loads( body )
+
+# -----------------------------------------------------------------------------------------------
+def test_not_found( path ):
+    status, _, body = handle_request( 'GET', '/restaurantes', path=path )
+    assert status == HTTPStatus.NOT_FOUND
+    assert '/restaurants' in json.loads( body )['routes']
+
+# -----------------------------------------------------------------------------------------------
+def test_method_not_allowed( path ):
+    status, headers, _ = handle_request( 'POST', '/countries', path=path )
+    assert status == HTTPStatus.METHOD_NOT_ALLOWED
+    assert headers['Allow'] == 'GET, HEAD'
+
+# -----------------------------------------------------------------------------------------------
+def test_health( path ):
+    status, _, body = handle_request( 'GET', '/health', path=path )
+    assert status == HTTPStatus.OK
+    assert json.loads( body )['rows'] == len( get_dataset( path ).df )
+
+# -----------------------------------------------------------------------------------------------
+def test_internal_error_gets_a_response( path, monkeypatch ):
+    """ Um erro não previsto na consulta vira 500 em JSON, sem fechar a conexão calada """
+    def fail( *args ):
+        raise RuntimeError( 'falha' )
+    monkeypatch.setattr( api, 'handle_request', fail )
+
+    async def request():
+        server = await asyncio.start_server( lambda reader, writer: handle_connection( reader, writer, path ), '127.0.0.1', 0 )
+        async with server:
+            reader, writer = await asyncio.open_connection( *server.sockets[0].getsockname()[:2] )
+            writer.write( b'GET /countries HTTP/1.1\r\nHost: teste\r\n\r\n' )
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+
+    head, _, body = asyncio.run( request() ).partition( b'\r\n\r\n' )
+    assert head.startswith( b'HTTP/1.1 500 ' )
+    assert json.loads( body ) == { 'error': 'Erro interno' }
@@ -0,0 +1,207 @@
+# Libraries
+import inflection
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.data import COLUMNS, DATA_PATH, clean_code, clean_columns
+
+
+# Colunas do clean_code original (all_cuisines veio depois)
+ORIGINAL_COLUMNS = [col for col in COLUMNS if col != 'all_cuisines']
+
+
+# =======================================
+# Implementação de referência: cópia literal do clean_code original das páginas
+# (apply linha a linha, etapas 1 a 9), só com o nome trocado
+# =======================================
+
+def original_clean_code( df ): 
+    """ Esta funcao tem a responsabilidade de limpar o dataframe 
+    
+        Tipos de limpeza:
+        1. Preenchimento do nome dos países
+        2. Criação do Tipo de Categoria de Comida
+        3. Criação do nome das Cores
+        4. Renomear as colunas do DataFrame
+        5. Categorizar por tipo de culinária
+        6. Selecionar somente algumas colunas
+        7. Excluir linhas com dados ausentes
+        8. Excluir linhas duplicados
+        9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
+        
+        Input: Dataframe
+        Output: Dataframe
+    """
+    # 1. Preenchimento do nome dos países
+ 
+    COUNTRIES = {
+    1: "India",
+    14: "Australia",
+    30: "Brazil",
+    37: "Canada",
+    94: "Indonesia",
+    148: "New Zeland",
+    162: "Philippines",
+    166: "Qatar",
+    184: "Singapure",
+    189: "South Africa",
+    191: "Sri Lanka",
+    208: "Turkey",
+    214: "United Arab Emirates",
+    215: "England",
+    216: "United States of America",
+    }
+
+    def country_name(country_id):
+        return COUNTRIES[country_id]
+    
+    df['country_name'] = df.loc[:, 'Country Code'].apply(lambda x: country_name (x))
+
+    # 2. Criação do Tipo de Categoria de Comida
+
+    def create_price_tye(price_range):
+        if price_range == 1:
+            return "cheap"
+        elif price_range == 2:
+            return "normal"
+        elif price_range == 3:
+            return "expensive"
+        else:
+            return "gourmet"
+    
+    df['price_range_name'] = df.loc[:, 'Price range'].apply(lambda x: create_price_tye (x))
+
+    # 3. Criação do nome das Cores
+    COLORS = {
+    "3F7E00": "darkgreen",
+    "5BA829": "green",
+    "9ACD32": "lightgreen",
+    "CDD614": "orange",
+    "FFBA00": "red",
+    "CBCBC8": "darkred",
+    "FF7800": "darkred",
+    }
+    def color_name(color_code):
+        return COLORS[color_code]
+
+    df['color_name'] = df.loc[:, 'Rating color'].apply(lambda x: color_name (x))
+
+    # 4. Renomear as colunas do DataFrame
+
+    def rename_columns(dataframe):
+        title = lambda x: inflection.titleize(x)
+        snakecase = lambda x: inflection.underscore(x)
+        spaces = lambda x: x.replace(" ", "")
+        cols_old = list(df.columns)
+        cols_old = list(map(title, cols_old))
+        cols_old = list(map(spaces, cols_old))
+        cols_new = list(map(snakecase, cols_old))
+        df.columns = cols_new
+        return df
+    df= rename_columns(df)
+
+    # 5. Categorizar por tipo de culinária
+    df["cuisines"]=df["cuisines"].fillna("")
+    df["cuisines"] = df.loc[:, "cuisines"].apply(lambda x: x.split(",")[0])
+
+     # 6. Selecionar somente algumas colunas
+    df_new = df.loc[:, ['restaurant_id', 'restaurant_name', 'city', 'address',
+       'locality', 'locality_verbose', 'longitude', 'latitude', 'cuisines',
+       'average_cost_for_two', 'currency', 'has_table_booking',
+       'has_online_delivery', 'is_delivering_now', 'aggregate_rating', 'rating_text',
+       'votes', 'country_name', 'price_range_name', 'color_name']]
+
+    # 7. Excluir linhas com dados ausentes
+    df_new = df_new.dropna(axis=0)
+
+    # 8. Excluir linhas duplicados
+    df_new = df_new.drop_duplicates()
+
+    # 9. Excluir linhas cujo valor do prato para duas pessoas está com o valor zerado
+    df_new = df_new.loc[df_new.average_cost_for_two!=0,:]
+
+    return df_new
+
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture( scope='module' )
+def raw():
+    return pd.read_csv( DATA_PATH )
+
+# -----------------------------------------------------------------------------------------------
+def all_cuisines( value ):
+    """ Referência da etapa nova all_cuisines, linha a linha """
+    return ', '.join( [c.strip() for c in value.split( ',' ) if c.strip()] )
+
+# -----------------------------------------------------------------------------------------------
+def edge_rows( raw ):
+    """ Linhas sintéticas com os casos de borda, a partir das primeiras linhas do arquivo """
+    rows = pd.concat( [raw.head( 6 ), raw.head( 1 )], ignore_index=True )
+    rows['Restaurant ID'] = [1, 1, 2, 3, 4, 5, 1]
+    rows.loc[1, 'Votes'] = 999                  # atualização do restaurante 1...
+    rows.loc[2, 'Average Cost for two'] = 0     # preço zerado: sai
+    rows.loc[3, 'Price range'] = 7              # faixa desconhecida: gourmet
+    rows.loc[4, 'Cuisines'] = np.nan            # sem culinária: texto vazio
+    rows.loc[5, 'Cuisines'] = ' Italian ,, Pizza'
+    return rows                                 # ...e a última linha devolve o 1 à linha original
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_columns_matches_original( raw ):
+    """ As etapas vetorizadas (1 a 7), seguidas das etapas 8 e 9 como eram, dão exatamente o
+        resultado do clean_code original """
+    df_new = clean_columns( raw ).loc[:, ORIGINAL_COLUMNS].drop_duplicates()
+    df_new = df_new.loc[df_new.average_cost_for_two!=0, :]
+    pd.testing.assert_frame_equal( df_new, original_clean_code( raw.copy() ) )
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_code_keeps_last_row_per_restaurant( raw ):
+    """ Etapa nova: clean_code tem um restaurante por restaurant_id, com os valores da última
+        linha dele no resultado original """
+    df_new = clean_code( raw )
+    original = original_clean_code( raw.copy() )
+    assert not df_new['restaurant_id'].duplicated().any()
+
+    expected = original.loc[~original['restaurant_id'].duplicated( keep='last' ), :].set_index( 'restaurant_id' ).sort_index()
+    pd.testing.assert_frame_equal( df_new.loc[:, ORIGINAL_COLUMNS].set_index( 'restaurant_id' ).sort_index(), expected )
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_code_all_cuisines( raw ):
+    """ Etapa nova: lista completa das culinárias da linha, sem espaços nem itens vazios """
+    df_new = clean_code( raw )
+    expected = raw.loc[df_new.index, 'Cuisines'].fillna( '' ).map( all_cuisines )
+    assert list( df_new['all_cuisines'] ) == list( expected )
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_code_does_not_modify_input( raw ):
+    before = raw.copy()
+    clean_code( raw )
+    pd.testing.assert_frame_equal( raw, before )
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_code_edge_rows( raw ):
+    rows = edge_rows( raw )
+    df_new = clean_code( rows )
+
+    by_id = df_new.set_index( 'restaurant_id' )
+    assert list( by_id.index ) == [3, 4, 5, 1]
+    assert by_id.loc[1, 'votes'] == raw.loc[0, 'Votes']
+    assert by_id.loc[3, 'price_range_name'] == 'gourmet'
+    assert by_id.loc[4, 'cuisines'] == '' and by_id.loc[4, 'all_cuisines'] == ''
+    assert by_id.loc[5, 'cuisines'] == ' Italian ' and by_id.loc[5, 'all_cuisines'] == 'Italian, Pizza'
+
+    # nas colunas originais, as linhas são as do clean_code original tirando as repetições do 1
+    original = original_clean_code( rows.copy() )
+    assert list( original['restaurant_id'] ) == [1, 1, 3, 4, 5]
+    pd.testing.assert_frame_equal( df_new.loc[[3, 4, 5], ORIGINAL_COLUMNS], original.loc[[3, 4, 5], :] )
+
+# -----------------------------------------------------------------------------------------------
+def test_clean_code_unknown_country( raw ):
+    rows = raw.head( 2 ).copy()
+    rows['Country Code'] = 999
+    with pytest.raises( KeyError ):
+        clean_code( rows )
@@ -0,0 +1,79 @@
+# Libraries
+import shutil
+
+import pandas as pd
+import pytest
+
+from fome_zero import snapshot
+from fome_zero.aggregates import aggregate_state
+from fome_zero.data import DATA_PATH, clean_code, read_dataset
+from fome_zero.ingest import ingest_batch
+from fome_zero.schema import apply_schema
+
+
+# =======================================
+# Funções auxiliares
+# =======================================
+
+def write_batch( path, rows ):
+    """ Grava um lote com o cabeçalho do zomato.csv e as linhas brutas dadas """
+    with open( DATA_PATH, 'rb' ) as f:
+        header = f.readline()
+    with open( path, 'wb' ) as f:
+        f.write( header )
+        f.write( rows.to_csv( index=False, header=False ).encode( 'utf-8' ) )
+
+# -----------------------------------------------------------------------------------------------
+def assert_state_equal( state, expected ):
+    for name in expected._fields:
+        left, right = getattr( state, name ).sort_index(), getattr( expected, name ).sort_index()
+        if isinstance( right, pd.DataFrame ):
+            left = left.loc[:, right.columns]
+            pd.testing.assert_frame_equal( left, right, check_dtype=False, obj=name )
+        else:
+            pd.testing.assert_series_equal( left, right, check_dtype=False, check_names=False, obj=name )
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture
+def path( tmp_path ):
+    """ Cópia do zomato.csv numa pasta temporária (o lote altera o CSV, o snapshot e o estado) """
+    path = str( tmp_path / 'zomato.csv' )
+    shutil.copyfile( DATA_PATH, path )
+    return path
+
+# -----------------------------------------------------------------------------------------------
+def test_ingest_matches_full_clean( path, tmp_path ):
+    """ Ingestão lote a lote dá o mesmo dataframe e estado agregado que limpar o CSV inteiro,
+        inclusive quando um lote devolve o restaurante à linha original """
+    raw = pd.read_csv( path )
+    original = raw.iloc[[0]]
+    restaurant_id = original['Restaurant ID'].iloc[0]
+
+    updated = original.copy()
+    updated['Votes'] = 12345
+    new = raw.iloc[[1, 1, 2]].copy()                 # restaurante novo com linha repetida
+    new['Restaurant ID'] = [90000001, 90000001, 90000002]
+    new.loc[new.index[2], 'Average Cost for two'] = 0  # preço zerado: não entra
+    write_batch( tmp_path / 'lote1.csv', pd.concat( [updated, new] ) )
+    write_batch( tmp_path / 'lote2.csv', original )
+
+    ingest_batch( str( tmp_path / 'lote1.csv' ), path )
+    dataset = ingest_batch( str( tmp_path / 'lote2.csv' ), path )
+
+    expected = apply_schema( clean_code( pd.read_csv( path ) ) )
+    by_id = dataset.df.set_index( 'restaurant_id' )
+    assert by_id.loc[restaurant_id, 'votes'] == original['Votes'].iloc[0]
+    assert 90000001 in by_id.index and 90000002 not in by_id.index
+
+    pd.testing.assert_frame_equal( dataset.df, expected, check_dtype=False, check_categorical=False )
+    assert_state_equal( dataset.cache['aggregate_state'], aggregate_state( expected ) )
+
+    # outro processo: lê o snapshot e o estado gravados pela ingestão
+    df, version = read_dataset( path )
+    assert version == dataset.version
+    pd.testing.assert_frame_equal( df, expected, check_dtype=False, check_categorical=False )
+    assert_state_equal( snapshot.read_state( snapshot.state_path( path ), version ), aggregate_state( expected ) )
@@ -0,0 +1,83 @@
+# Libraries
+import shutil
+
+import numpy as np
+import pytest
+
+from fome_zero import queries, snapshot
+from fome_zero.aggregates import STATE_AGGREGATES, aggregate_state, cuisine_top_index, dataset_aggregate
+from fome_zero.bitmaps import bitmap_index
+from fome_zero.clusters import cluster_pyramid
+from fome_zero.cuisines import cuisine_membership
+from fome_zero.data import DATA_PATH, get_dataset
+from fome_zero.export import available_formats, export_bytes
+from fome_zero.maps import map_points
+from fome_zero.sketches import country_sketches
+from fome_zero.spatial import spatial_index
+
+
+pytest.importorskip( 'pyarrow' )
+
+# Estruturas derivadas que as páginas pedem ao Dataset (Dataset.derived)
+BUILDERS = {
+    'aggregate_state': aggregate_state,
+    'bitmap_index': bitmap_index,
+    'country_sketches': country_sketches,
+    'cuisine_membership': cuisine_membership,
+    'cuisine_top_index': cuisine_top_index,
+    'map_points': map_points,
+    'spatial_index': spatial_index,
+}
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture
+def dataset( tmp_path ):
+    """ Dataset lido do snapshot de uma cópia do zomato.csv (colunas sobre o memory-map) """
+    path = str( tmp_path / 'zomato.csv' )
+    shutil.copyfile( DATA_PATH, path )
+    return get_dataset( path )
+
+# -----------------------------------------------------------------------------------------------
+def shared_state( df ):
+    """ Blocos do frame e quantos deles são arrays numpy somente leitura (memory-map) """
+    blocks = df._mgr.blocks
+    return len( blocks ), sum( isinstance( block.values, np.ndarray ) and not block.values.flags.writeable for block in blocks )
+
+# -----------------------------------------------------------------------------------------------
+def test_publish_snapshot_version( tmp_path, dataset ):
+    """ Relido com a versão gravada, o frame vem do snapshot; com outra versão no arquivo
+        (outro processo trocou o snapshot no meio), fica o frame em memória """
+    df = dataset.df
+    path = str( tmp_path / 'outro.feather' )
+    assert shared_state( snapshot.publish_snapshot( df, path, 'v1' ) )[1] > 0
+
+    write_snapshot = snapshot.write_snapshot
+    try:
+        snapshot.write_snapshot = lambda df, path, version: write_snapshot( df, path, 'v2' )
+        assert snapshot.publish_snapshot( df, path, 'v1' ) is df
+    finally:
+        snapshot.write_snapshot = write_snapshot
+
+# -----------------------------------------------------------------------------------------------
+def test_shared_frame_stays_unconsolidated( dataset ):
+    """ Nenhum caminho das páginas, da API ou do download consolida o frame compartilhado
+        (o que copiaria as colunas do memory-map para memória privada e gravável) """
+    before = shared_state( dataset.df )
+    assert before[1] > 0
+
+    for name, builder in BUILDERS.items():
+        dataset.derived( name, builder )
+    cluster_pyramid( dataset.derived( 'map_points', map_points ) )
+    for name in STATE_AGGREGATES:
+        dataset_aggregate( dataset, name )
+
+    queries.home( dataset, ['Brazil', 'India'] )
+    queries.restaurants( dataset, ['Brazil'], n=5 )
+    for fmt in available_formats():
+        export_bytes( dataset, ['Brazil', 'India'], fmt )
+
+    assert shared_state( dataset.df ) == before
@@ -0,0 +1,75 @@
+# Libraries
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fome_zero.aggregates import home_metrics
+from fome_zero.cuisines import cuisine_membership
+from fome_zero.data import DATA_PATH, get_dataset
+from fome_zero.export import available_formats, export_bytes
+from fome_zero.filters import select
+from fome_zero.views import RowView
+
+
+# =======================================
+# Testes
+# =======================================
+
+@pytest.fixture
+def df():
+    return pd.DataFrame( { 'votes': [10, 20, 30, 40],
+                           'city': pd.Categorical( ['Rio', 'Goa', 'Rio', 'Pune'] ),
+                           'restaurant_name': pd.array( ['a', 'b', 'c', 'd'], dtype='string' ) },
+                         index=[5, 6, 7, 8] )
+
+# -----------------------------------------------------------------------------------------------
+def test_row_view_matches_iloc( df ):
+    rows = np.array( [3, 0, 2] )
+    view = RowView( df, rows )
+    assert view.n_rows == 3
+    np.testing.assert_array_equal( view.column( 'votes' ), [40, 10, 30] )
+    assert list( view.column( 'restaurant_name' ) ) == ['d', 'a', 'c']
+    np.testing.assert_array_equal( view.codes( 'city' ), df['city'].cat.codes.to_numpy()[rows] )
+    pd.testing.assert_frame_equal( view.frame( ['city', 'votes'] ), df.iloc[rows, [1, 0]] )
+    pd.testing.assert_frame_equal( view.frame( start=1, stop=3 ), df.iloc[rows[1:3]] )
+
+# -----------------------------------------------------------------------------------------------
+def test_row_view_all_rows( df ):
+    view = RowView( df )
+    assert view.n_rows == 4
+    np.testing.assert_array_equal( view.column( 'votes' ), df['votes'].to_numpy() )
+    pd.testing.assert_frame_equal( view.frame( start=2 ), df.iloc[2:] )
+
+# -----------------------------------------------------------------------------------------------
+def test_row_view_identity( df ):
+    """ Visões valem por identidade: comparar ou usar como chave não toca no dataframe """
+    view = RowView( df, np.array( [0, 1] ) )
+    assert view == view and view != RowView( df, np.array( [0, 1] ) )
+    assert { view: 1 }[view] == 1
+
+# -----------------------------------------------------------------------------------------------
+def shared_state( df ):
+    """ Blocos do frame e quantos deles são arrays numpy somente leitura (memory-map) """
+    blocks = df._mgr.blocks
+    return len( blocks ), sum( isinstance( block.values, np.ndarray ) and not block.values.flags.writeable for block in blocks )
+
+# -----------------------------------------------------------------------------------------------
+def test_shared_frame_survives_home_and_export( tmp_path ):
+    """ Agregar e exportar pela visão não consolida o frame compartilhado do snapshot (que
+        copiaria as colunas do memory-map para memória privada) """
+    pytest.importorskip( 'pyarrow' )
+    path = str( tmp_path / 'zomato.csv' )
+    shutil.copyfile( DATA_PATH, path )
+    dataset = get_dataset( path )
+    before = shared_state( dataset.df )
+    assert before[1] > 0
+
+    view = select( dataset, ['Brazil', 'India'] )
+    metrics = home_metrics( view, dataset.derived( 'cuisine_membership', cuisine_membership ) )
+    assert metrics['countries'] == 2
+    for fmt in available_formats():
+        export_bytes( dataset, ['Brazil', 'India'], fmt )
+
+    assert shared_state( dataset.df ) == before